@@ -0,0 +1,219 @@
+import argparse
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing
+from pathlib import Path
+
+import httplib2
+
+import board
+import google_sheets
+import main as bingo
+from google_sheets import client, emulator, rate_limiter, request_templates
+
+
+def build_team_sheet(num_rows: int) -> google_sheets.Sheet:
+    # Mirrors the sheet Team.update builds, every row has both a power-up and a curse
+    header = google_sheets.Row([
+        google_sheets.Cell('Completed', bold=True),
+        google_sheets.Cell('Power-up Objectives', bold=True),
+        google_sheets.Cell(''),
+        google_sheets.Cell('Used', bold=True),
+        google_sheets.Cell('Curse', bold=True)
+    ])
+    sheet = google_sheets.Sheet(0, header)
+    for i in range(num_rows):
+        sheet.append_row(google_sheets.Row([
+            google_sheets.Cell('TRUE' if i % 2 else 'FALSE', checkbox=True),
+            google_sheets.Cell(f'Power-up {i}', strikethrough=i % 2 == 1),
+            google_sheets.Cell(''),
+            google_sheets.Cell('FALSE', checkbox=True),
+            google_sheets.Cell(f'Curse {i}')
+        ]))
+    return sheet
+
+
+def time_sheet_requests(num_rows: int, iterations: int) -> float:
+    """
+    Returns the average time in seconds to build the request body for a team sheet, each time for
+    a different sheet ID like when every team's sheet is first written.
+    """
+    sheet = build_team_sheet(num_rows)
+    start = time.perf_counter()
+    for sheet_id in range(iterations):
+        sheet.sheet_id = sheet_id
+        sheet.get_requests()
+    return (time.perf_counter() - start) / iterations
+
+
+def benchmark_requests(num_rows: int, iterations: int) -> None:
+    google_sheets.google_sheets.CACHE_LAYOUTS = False
+    request_templates.COMPILE_TEMPLATES = False
+    uncompiled_requests = build_team_sheet(num_rows).get_requests()
+    uncompiled = time_sheet_requests(num_rows, iterations)
+
+    request_templates.COMPILE_TEMPLATES = True
+    compiled_requests = build_team_sheet(num_rows).get_requests()
+    compiled = time_sheet_requests(num_rows, iterations)
+
+    google_sheets.google_sheets.CACHE_LAYOUTS = True
+    cached_requests = build_team_sheet(num_rows).get_requests()
+    cached = time_sheet_requests(num_rows, iterations)
+
+    if compiled_requests != uncompiled_requests:
+        raise RuntimeError('Compiled templates do not produce the same requests')
+    if cached_requests != compiled_requests:
+        raise RuntimeError('Cached layouts do not produce the same requests')
+
+    tracemalloc.start()
+    sheet = build_team_sheet(num_rows)
+    sheet_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    num_cells = sum(len(row.cells) for row in [sheet.header] + sheet.rows)
+
+    print(f'Request building for a {num_rows} row sheet ({len(compiled_requests)} requests):')
+    print(f'  Template files: {uncompiled * 1000:.2f} ms')
+    print(f'  Compiled:       {compiled * 1000:.2f} ms ({uncompiled / compiled:.1f}x)')
+    print(f'  Cached layout:  {cached * 1000:.2f} ms ({uncompiled / cached:.1f}x)')
+    print(f'  Sheet size:     {sheet_size / 1024:.1f} KiB ({sheet_size / num_cells:.0f} bytes per cell)')
+
+
+def benchmark_boards(num_teams: int, iterations: int) -> None:
+    rng = random.Random(0)
+    generator = board.BoardGenerator(
+        [f'Objective {i}' for i in range(100)],
+        [f'Wild Card {i}' for i in range(10)],
+        difficulties=[rng.randint(1, 5) for _ in range(100)],
+        categories=[f'Category {i % 8}' for i in range(100)]
+    )
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        boards = generator.generate(num_teams, seed=i)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    print(f'Board generation for {num_teams} teams ({board.CANDIDATES} candidate boards):')
+    print(f'  Time:           {elapsed * 1000:.1f} ms')
+    print(f'  Distinct:       {len(set(map(tuple, boards)))} of {num_teams} boards')
+
+
+def benchmark_game(num_teams: int, ticks: int, workers: int, latency: float) -> None:
+    sheets = emulator.SheetsEmulator(latency=latency, seed=0)
+    client.set_service_factory(lambda: sheets)
+    # Measure the game itself, not the pacing to stay within the real quota
+    rate_limiter.set_quotas(1_000_000, 1_000_000)
+    random.seed(0)
+
+    start = time.perf_counter()
+    game = bingo.Game(sheets.add_game(bingo.Game.SPREADSHEET_ID, num_teams), workers)
+    setup = time.perf_counter() - start
+
+    tick_times = []
+    for tick in range(ticks):
+        # Every other tick, one player on each of the first few teams completes a power-up
+        if tick % 2 == 0:
+            for team_id in [f'team-{i}' for i in range(min(num_teams, 5))]:
+                game_sheet = sheets.get_spreadsheet(team_id).get_sheet_by_title('Game')
+                game_sheet.set_value(tick // 2 + 1, 0, 'TRUE')
+
+        start = time.perf_counter()
+        game.process()
+        tick_times.append(time.perf_counter() - start)
+
+    client.set_service_factory(None)
+    rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    print(f'Game with {num_teams} teams, {workers} workers, {latency * 1000:.0f} ms per call (emulated):')
+    print(f'  Setup:          {setup:.2f} s')
+    print(f'  Average tick:   {sum(tick_times) / len(tick_times) * 1000:.1f} ms')
+    print(f'  Slowest tick:   {max(tick_times) * 1000:.1f} ms')
+    print(f'  HTTP requests:  {sheets.http_requests}')
+    print(f'  API calls:      {dict(sheets.calls)}')
+
+
+def time_import(module: str) -> float:
+    # In a new interpreter, so nothing is imported yet
+    code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=Path(__file__).parent)
+    return float(result.stdout)
+
+
+def time_to_first_tick(num_teams: int, workers: int, latency: float, build: typing.Callable[[], object]) -> float:
+    """
+    Returns the seconds from creating a Game to the end of its first tick, against the emulator.
+    build is called once for every thread's API client, like client.build_service would be.
+    """
+    sheets = emulator.SheetsEmulator(latency=latency, seed=0)
+    team_ids = sheets.add_game(bingo.Game.SPREADSHEET_ID, num_teams)
+    client.set_service_factory(lambda: (build(), sheets)[1])
+    client.get_discovery_document.cache_clear()
+    random.seed(0)
+
+    start = time.perf_counter()
+    game = bingo.Game(team_ids, workers)
+    game.process()
+    return time.perf_counter() - start
+
+
+def benchmark_startup(team_counts: list[int], workers: int, latency: float) -> None:
+    from googleapiclient.discovery import build
+
+    rate_limiter.set_quotas(1_000_000, 1_000_000)
+    builds = {
+        'Discovery per client': lambda: build(client.API_NAME, client.API_VERSION, http=httplib2.Http()),
+        'Shared document': lambda: client.build_client(httplib2.Http())
+    }
+    build_times = {}
+    for name, build_client in builds.items():
+        client.get_discovery_document.cache_clear()
+        build_client()
+        start = time.perf_counter()
+        for _ in range(20):
+            build_client()
+        build_times[name] = (time.perf_counter() - start) / 20
+    results = {
+        name: [time_to_first_tick(num_teams, workers, latency, build_client) for num_teams in team_counts]
+        for name, build_client in builds.items()
+    }
+    client.set_service_factory(None)
+    rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    print('Startup:')
+    print(f'  import main:    {time_import("main") * 1000:.0f} ms')
+    for name, build_time in build_times.items():
+        print(f'  Client ({name.lower()}): {build_time * 1000:.2f} ms')
+    print(f'Time to first tick, {workers} workers, {latency * 1000:.0f} ms per call (emulated):')
+    print('  Teams  ' + ''.join(f'{name:>24}' for name in results))
+    for i, num_teams in enumerate(team_counts):
+        print(f'  {num_teams:<5}  ' + ''.join(f'{times[i]:>22.2f} s' for times in results.values()))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('benchmark', help='Which benchmark to run', choices=['requests', 'game', 'board', 'startup'], nargs='?', default='requests')
+    parser.add_argument('--rows', help='Number of rows in the benchmark sheet', type=int, default=100)
+    parser.add_argument('--iterations', help='Number of times to repeat each measurement', type=int, default=20)
+    parser.add_argument('--teams', help='Number of teams in the benchmark game', type=int, default=50)
+    parser.add_argument('--team_counts', help='Numbers of teams to time the startup of', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--ticks', help='Number of times to call Game.process', type=int, default=10)
+    parser.add_argument('--workers', help='Number of teams to update at the same time', type=int, default=4)
+    parser.add_argument('--latency', help='Seconds each emulated API call takes', type=float, default=0.1)
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.benchmark == 'requests':
+        benchmark_requests(args.rows, args.iterations)
+    elif args.benchmark == 'board':
+        benchmark_boards(args.teams, args.iterations)
+    elif args.benchmark == 'startup':
+        benchmark_startup(args.team_counts, args.workers, args.latency)
+    else:
+        benchmark_game(args.teams, args.ticks, args.workers, args.latency)
+
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,217 @@
+import html
+import http.cookiejar
+import http.cookies
+import http.server
+import json
+import re
+import secrets
+import threading
+import urllib.parse
+import urllib.request
+
+BINGOSYNC_URL = 'https://bingosync.com'
+
+# Values of the new room form on bingosync.com
+GAME_TYPE_CUSTOM = '18'  # Custom (Advanced)
+VARIANT_FIXED_BOARD = '18'  # The board is exactly the given JSON
+LOCKOUT_MODE_NON_LOCKOUT = '1'
+LOCKOUT_MODE_LOCKOUT = '2'
+
+# Seconds before a request to bingosync is abandoned
+HTTP_TIMEOUT = 30
+
+CSRF_COOKIE = 'csrftoken'
+CSRF_FIELD = 'csrfmiddlewaretoken'
+CSRF_FIELD_REGEX = re.compile(rf'name="{CSRF_FIELD}"\s+value="([^"]+)"')
+ROOM_PATH_REGEX = re.compile(r'^/room/([\w-]+)/?$')
+ERROR_REGEX = re.compile(r'<ul class="errorlist[^"]*">(.*?)</ul>', re.DOTALL)
+
+
+class BingosyncClient:
+    """
+    Creates bingosync rooms by submitting the new room form over HTTP, like a browser would.
+    The session and CSRF cookies are kept between requests.
+
+    Args:
+        base_url: Where bingosync is, e.g. the url of a StandInServer for testing.
+    """
+
+    def __init__(self, base_url: str = BINGOSYNC_URL) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def get_csrf_token(self) -> str:
+        # Loading the new room form sets the CSRF cookie, the form has the (masked) token to send back
+        with self.opener.open(f'{self.base_url}/', timeout=HTTP_TIMEOUT) as response:
+            page = response.read().decode('utf-8')
+
+        match = CSRF_FIELD_REGEX.search(page)
+        if match is not None:
+            return html.unescape(match.group(1))
+        for cookie in self.cookies:
+            if cookie.name == CSRF_COOKIE:
+                return cookie.value
+        raise RuntimeError('Unable to find the CSRF token on the bingosync new room page')
+
+    def create_room(
+        self,
+        room_name: str,
+        password: str,
+        board_json: str,
+        nickname: str = 'Host',
+        lockout: bool = True,
+        spectator: bool = True,
+        hide_card: bool = True
+    ) -> str:
+        """
+        Creates a room with a custom board.
+
+        Args:
+            board_json: The board, a JSON list of {"name": ...} objects (see Game.serialize_board).
+
+        Returns:
+            str: The URL of the new room.
+        """
+        fields = {
+            CSRF_FIELD: self.get_csrf_token(),
+            'room_name': room_name,
+            'passphrase': password,
+            'nickname': nickname,
+            'game_type': GAME_TYPE_CUSTOM,
+            'variant_type': VARIANT_FIXED_BOARD,
+            'custom_json': board_json,
+            'lockout_mode': LOCKOUT_MODE_LOCKOUT if lockout else LOCKOUT_MODE_NON_LOCKOUT,
+            'seed': ''
+        }
+        # Unchecked checkboxes aren't sent at all
+        if spectator:
+            fields['is_spectator'] = 'on'
+        if hide_card:
+            fields['hide_card'] = 'on'
+
+        request = urllib.request.Request(
+            f'{self.base_url}/',
+            data=urllib.parse.urlencode(fields).encode('utf-8'),
+            # Django checks the referer of HTTPS form posts
+            headers={'Referer': f'{self.base_url}/', 'Content-Type': 'application/x-www-form-urlencoded'},
+            method='POST'
+        )
+        with self.opener.open(request, timeout=HTTP_TIMEOUT) as response:
+            # Success redirects to the room, otherwise the form comes back with the errors
+            url = response.geturl()
+            page = response.read().decode('utf-8')
+
+        if ROOM_PATH_REGEX.match(urllib.parse.urlparse(url).path) is None:
+            errors = [re.sub(r'<[^>]+>', ' ', error).strip() for error in ERROR_REGEX.findall(page)]
+            raise RuntimeError(f'Bingosync did not create the room: {"; ".join(errors) or "unknown error"}')
+        return url
+
+    base_url: str
+    cookies: http.cookiejar.CookieJar
+    opener: urllib.request.OpenerDirector
+
+
+class StandInServer:
+    """
+    A local stand in for bingosync's new room form, for testing BingosyncClient without the network.
+    Checks the CSRF token and the form like bingosync does, and keeps the rooms it creates in rooms.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.rooms = {}
+        self.csrf_token = secrets.token_hex(16)
+        self.server = http.server.ThreadingHTTPServer((host, port), self.__make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'StandInServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_form_errors(self, fields: dict[str, str], cookie_token: str | None) -> list[str]:
+        errors = []
+        if cookie_token != self.csrf_token or fields.get(CSRF_FIELD) != self.csrf_token:
+            errors.append('CSRF verification failed')
+        for name in ('room_name', 'passphrase', 'nickname', 'game_type', 'variant_type', 'lockout_mode'):
+            if not fields.get(name):
+                errors.append(f'{name}: This field is required')
+        try:
+            board = json.loads(fields.get('custom_json', ''))
+            if len(board) != 25 or not all(isinstance(square, dict) and 'name' in square for square in board):
+                errors.append('custom_json: A board must have 25 squares with names')
+        except ValueError:
+            errors.append('custom_json: Invalid JSON')
+        return errors
+
+    def __make_handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def send_page(self, body: str, status: int = 200) -> None:
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Set-Cookie', f'{CSRF_COOKIE}={stand_in.csrf_token}; Path=/')
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_form(self, errors: list[str] = []) -> None:
+                error_list = ''.join(f'<li>{html.escape(error)}</li>' for error in errors)
+                self.send_page(
+                    f'<form method="post"><input type="hidden" name="{CSRF_FIELD}" value="{stand_in.csrf_token}">'
+                    + (f'<ul class="errorlist">{error_list}</ul>' if errors else '')
+                    + '</form>'
+                )
+
+            def do_GET(self) -> None:
+                match = ROOM_PATH_REGEX.match(self.path)
+                if self.path == '/':
+                    self.send_form()
+                elif match is not None and match.group(1) in stand_in.rooms:
+                    self.send_page(html.escape(stand_in.rooms[match.group(1)]['room_name']))
+                else:
+                    self.send_page('Not found', 404)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get('Content-Length', 0))
+                fields = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True))
+                cookies = http.cookies.SimpleCookie(self.headers.get('Cookie', ''))
+                cookie_token = cookies[CSRF_COOKIE].value if CSRF_COOKIE in cookies else None
+
+                errors = stand_in.get_form_errors(fields, cookie_token)
+                if errors:
+                    self.send_form(errors)
+                    return
+
+                room_id = secrets.token_urlsafe(16)
+                stand_in.rooms[room_id] = fields
+                self.send_response(302)
+                self.send_header('Location', f'/room/{room_id}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return Handler
+
+    rooms: dict[str, dict[str, str]]
+    csrf_token: str
+    server: http.server.ThreadingHTTPServer
+    thread: threading.Thread
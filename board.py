@@ -0,0 +1,153 @@
+import numpy as np
+
+# Number of random boards generated and scored for every board that is picked
+CANDIDATES = 4096
+
+# Most random numbers drawn at once while sampling, bounds memory use for long objective lists
+MAX_SAMPLE_ELEMENTS = 4_000_000
+
+
+def get_lines(size: int) -> np.ndarray:
+    """
+    Returns the cell indices (row by row) of every row, column and both diagonals of a size x size board.
+    """
+    cells = np.arange(size * size).reshape(size, size)
+    return np.concatenate([cells, cells.T, [cells.diagonal()], [np.fliplr(cells).diagonal()]])
+
+
+def sample_without_replacement(rng: np.random.Generator, population: int, k: int, n: int) -> np.ndarray:
+    """
+    Returns n rows of k distinct indices below population, each row in random order.
+    """
+    if k == 0:
+        return np.empty((n, 0), dtype=np.intp)
+
+    rows = []
+    chunk = max(1, MAX_SAMPLE_ELEMENTS // population)
+    for start in range(0, n, chunk):
+        keys = rng.random((min(chunk, n - start), population))
+        # The k smallest keys are a uniform sample, sorting only those puts them in random order
+        smallest = np.argpartition(keys, k - 1, axis=1)[:, :k] if k < population else np.argsort(keys, axis=1)
+        order = np.argsort(np.take_along_axis(keys, smallest, axis=1), axis=1)
+        rows.append(np.take_along_axis(smallest, order, axis=1))
+    return np.concatenate(rows)
+
+
+class BoardGenerator:
+    """
+    Generates bingo boards without repeated objectives or wild cards. Many random boards are
+    generated and scored at once, and the best are picked: boards where no row, column or diagonal
+    has two objectives of the same category, and where lines are as close in total difficulty as
+    possible.
+
+    Args:
+        objectives: Every objective that can be on a board.
+        wild_cards: Every wild card that can be on a board.
+        difficulties: Difficulty of each objective, or None to not balance difficulty.
+        categories: Category of each objective ('' for none), or None to not balance categories.
+        size: Number of rows and columns on a board.
+        eight_balls: Number of objectives on each board marked as an 8-ball.
+        num_wild_cards: Number of wild cards on each board.
+    """
+
+    def __init__(
+        self,
+        objectives: list[str],
+        wild_cards: list[str],
+        difficulties: list[float] | None = None,
+        categories: list[str] | None = None,
+        size: int = 5,
+        eight_balls: int = 1,
+        num_wild_cards: int = 1
+    ) -> None:
+        num_objectives = size * size - num_wild_cards
+        if num_objectives > len(objectives) or num_wild_cards > len(wild_cards) or eight_balls > num_objectives:
+            raise ValueError(
+                f'A {size}x{size} board needs {num_objectives} objectives and {num_wild_cards} wild cards, '
+                f'got {len(objectives)} and {len(wild_cards)}'
+            )
+
+        self.items = list(objectives) + list(wild_cards)
+        self.num_objectives = len(objectives)
+        self.size = size
+        self.eight_balls = eight_balls
+        self.num_wild_cards = num_wild_cards
+        self.lines = get_lines(size)
+
+        # Wild cards count as average difficulty and have no category
+        self.difficulties = None
+        if difficulties is not None:
+            values = np.asarray(difficulties, dtype=float)
+            self.difficulties = np.concatenate([values, np.full(len(wild_cards), values.mean())])
+        self.categories = None
+        if categories is not None:
+            names = {name: i for i, name in enumerate(sorted(set(categories) - {''}))}
+            ids = [names.get(category, -1) for category in categories]
+            self.categories = np.array(ids + [-1] * len(wild_cards))
+
+    def sample(self, rng: np.random.Generator, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns n random boards as item indices (row by row), and the cells of each board's 8-balls.
+        """
+        cells = self.size * self.size
+        positions = sample_without_replacement(rng, cells, cells, n)
+        objectives = sample_without_replacement(rng, self.num_objectives, cells - self.num_wild_cards, n)
+        wild_cards = sample_without_replacement(rng, len(self.items) - self.num_objectives, self.num_wild_cards, n)
+
+        boards = np.empty((n, cells), dtype=np.intp)
+        rows = np.arange(n)[:, None]
+        boards[rows, positions[:, :self.num_wild_cards]] = self.num_objectives + wild_cards
+        boards[rows, positions[:, self.num_wild_cards:]] = objectives
+        # Objectives are placed in random positions, so the first few are as good as any for 8-balls
+        eight_balls = positions[:, self.num_wild_cards:self.num_wild_cards + self.eight_balls]
+        return boards, eight_balls
+
+    def score(self, boards: np.ndarray) -> np.ndarray:
+        """
+        Returns the score of each board, lower is better. Each pair of objectives of the same category
+        in a line costs 1, and the spread of line difficulties adds up to about 1 more.
+        """
+        scores = np.zeros(len(boards))
+        if self.categories is not None:
+            lines = np.sort(self.categories[boards][:, self.lines], axis=2)
+            repeats = (lines[:, :, 1:] == lines[:, :, :-1]) & (lines[:, :, 1:] >= 0)
+            scores += repeats.sum(axis=(1, 2))
+        if self.difficulties is not None:
+            totals = self.difficulties[boards][:, self.lines].sum(axis=2)
+            # Relative to the spread of lines made of random objectives
+            expected = self.difficulties.std() * np.sqrt(self.size)
+            scores += totals.std(axis=1) / expected if expected > 0 else 0
+        return scores
+
+    def format(self, board: np.ndarray, eight_balls: np.ndarray) -> list[str]:
+        ret = []
+        for cell, item in enumerate(board):
+            name = self.items[item]
+            if item >= self.num_objectives:
+                name = f'[WC] {name}'
+            elif cell in eight_balls:
+                name = f'[8-Ball] {name}'
+            ret.append(name)
+        return ret
+
+    def generate(self, count: int = 1, seed: int | None = None, candidates: int = CANDIDATES) -> list[list[str]]:
+        """
+        Returns the best count boards out of candidates random boards, e.g. one for each team.
+        The same seed always gives the same boards.
+
+        Returns:
+            list[list[str]]: The cells of each board, row by row.
+        """
+        rng = np.random.default_rng(seed)
+        boards, eight_balls = self.sample(rng, max(candidates, count))
+        best = np.argsort(self.score(boards), kind='stable')[:count]
+        return [self.format(boards[i], eight_balls[i]) for i in best]
+
+    items: list[str]
+    num_objectives: int
+    size: int
+    eight_balls: int
+    num_wild_cards: int
+    lines: np.ndarray
+    difficulties: np.ndarray | None
+    categories: np.ndarray | None
@@ -0,0 +1,279 @@
+import gzip
+import json
+import threading
+import time
+import typing
+from functools import cache
+
+import httplib2
+from oauth2client.service_account import ServiceAccountCredentials
+from googleapiclient.http import HttpError, HttpRequest
+
+from .rate_limiter import LIMITERS, MAX_RETRIES, RETRY_STATUSES, CallKind, backoff_delay
+from .request_templates import PACKAGE_DIR
+from .usage import USAGE
+
+if typing.TYPE_CHECKING:
+    # As per sheets API docs, pylance doesn't like this but it is required
+    from googleapiclient._apis.sheets.v4 import SheetsResource  # type: ignore
+
+SERV_ACC_PATH = PACKAGE_DIR / 'GServAcc'  # NOTE: Modify as necessary
+
+SCOPES = 'https://www.googleapis.com/auth/spreadsheets'
+
+API_NAME = 'sheets'
+API_VERSION = 'v4'
+
+# Seconds before a call to the API is abandoned
+HTTP_TIMEOUT = 60
+
+# Google limits how many calls can be sent in one batch HTTP request
+MAX_BATCH_HTTP_REQUESTS = 100
+
+# Bounds on a single spreadsheets.batchUpdate call, Google recommends keeping payloads under 2 MB
+MAX_BATCH_UPDATE_REQUESTS = 500
+MAX_BATCH_UPDATE_BYTES = 2_000_000
+
+# Request bodies at least this big are gzipped, smaller ones aren't worth it. Off by default: only the
+# emulator has been checked to accept them, not the real API
+COMPRESS_REQUESTS = False
+GZIP_MIN_BYTES = 1024
+
+# Failures of the connection rather than the API (timeouts, resets, failed DNS lookups), retried like RETRY_STATUSES
+TRANSPORT_ERRORS = (TimeoutError, ConnectionError, httplib2.HttpLib2Error)
+# Everything execute and execute_batch can fail with once the retries run out
+API_ERRORS = (HttpError, *TRANSPORT_ERRORS)
+
+type JSON = typing.Any
+
+# httplib2 connections are not thread safe, so each thread gets its own service and connection pool
+thread_local = threading.local()
+
+
+@cache
+def get_credentials() -> ServiceAccountCredentials:
+    """
+    Returns the service account credentials, loaded once per process. Every connection shares
+    these, so the access token is only fetched (and refreshed) once for all spreadsheets.
+    """
+    with open(SERV_ACC_PATH, 'r', encoding='utf-8') as f:
+        GServAcc = json.loads(f.read())
+
+    return ServiceAccountCredentials.from_json_keyfile_dict(GServAcc, scopes=SCOPES)
+
+
+@cache
+def get_discovery_document() -> str:
+    """
+    Returns the Sheets API discovery document as JSON text, loaded once per process. The copy bundled
+    with google-api-python-client is used, older versions without one fetch it once with
+    cache_discovery so later processes find it in the discovery cache.
+    """
+    # googleapiclient.discovery is only needed to build a real client, not with the emulator
+    from googleapiclient import discovery_cache
+    from googleapiclient.discovery import build
+
+    document = discovery_cache.get_static_doc(API_NAME, API_VERSION) if hasattr(discovery_cache, 'get_static_doc') else None
+    if document is None:
+        return json.dumps(build(API_NAME, API_VERSION, http=httplib2.Http(timeout=HTTP_TIMEOUT), cache_discovery=True)._rootDesc)
+    return document
+
+
+def build_client(http: httplib2.Http) -> 'SheetsResource':
+    # Every thread's client is built from the same text, nothing is read or fetched again. Each build parses
+    # its own copy, googleapiclient modifies the parsed document while building
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(get_discovery_document(), http=http)
+
+
+def build_service() -> 'SheetsResource':
+    return build_client(get_credentials().authorize(httplib2.Http(timeout=HTTP_TIMEOUT)))
+
+
+# Builds the API client for each thread, see set_service_factory
+service_factory: typing.Callable[[], 'SheetsResource'] = build_service
+
+
+def set_service_factory(factory: typing.Callable[[], 'SheetsResource'] | None) -> None:
+    """
+    Replaces how the API client is built, for example with an emulator.SheetsEmulator to run without
+    the network. Pass None to go back to the real API. Takes effect on the next call on every thread.
+    """
+    global service_factory
+    service_factory = build_service if factory is None else factory
+
+
+def get_service() -> 'SheetsResource':
+    """
+    Returns the Sheets API client for the calling thread. The client keeps its HTTPS connection
+    to the API alive between calls, and is shared by every GoogleSheets object on the thread.
+    """
+    if getattr(thread_local, 'factory', None) is not service_factory:
+        thread_local.service = service_factory()
+        thread_local.factory = service_factory
+    return thread_local.service
+
+
+def compress(request: HttpRequest) -> HttpRequest:
+    """
+    Gzips the body of request (in place) if it is big enough to be worth it. Returns the request.
+    """
+    body = getattr(request, 'body', None)
+    if not COMPRESS_REQUESTS or body is None or len(body) < GZIP_MIN_BYTES:
+        return request
+
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    request.body = gzip.compress(body)
+    request.body_size = len(request.body)
+    request.headers['content-encoding'] = 'gzip'
+    request.headers.pop('content-length', None)
+    return request
+
+
+def get_request_size(request: JSON) -> int:
+    return len(json.dumps(request, separators=(',', ':')))
+
+
+def split_request(request: JSON, max_bytes: int) -> list[tuple[JSON, int]]:
+    """
+    Splits an updateCells request bigger than max_bytes into requests for fewer rows. Any other
+    request is returned as is.
+
+    Returns:
+        (request, size in bytes) for each part, in order.
+    """
+    size = get_request_size(request)
+    update = request.get('updateCells')
+    if size <= max_bytes or update is None or 'start' not in update or len(update.get('rows', [])) < 2:
+        return [(request, size)]
+
+    rows = update['rows']
+    half = len(rows) // 2
+    start = update['start']
+    first = {'updateCells': {**update, 'rows': rows[:half]}}
+    second = {'updateCells': {
+        **update,
+        'start': {**start, 'rowIndex': start.get('rowIndex', 0) + half},
+        'rows': rows[half:]
+    }}
+    return split_request(first, max_bytes) + split_request(second, max_bytes)
+
+
+def chunk_requests(
+    requests: list[JSON],
+    max_requests: int = MAX_BATCH_UPDATE_REQUESTS,
+    max_bytes: int = MAX_BATCH_UPDATE_BYTES
+) -> list[list[JSON]]:
+    """
+    Splits requests into lists small enough for one batchUpdate call each. Requests stay in the
+    same order, so sending the lists one after another keeps anything that depends on an earlier
+    request (merges before formats, values before validation) working.
+    """
+    chunks = []
+    chunk = []
+    chunk_bytes = 0
+    for request in requests:
+        for part, size in split_request(request, max_bytes):
+            if chunk and (len(chunk) == max_requests or chunk_bytes + size > max_bytes):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(part)
+            chunk_bytes += size
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def is_retryable(e: Exception) -> bool:
+    return isinstance(e, TRANSPORT_ERRORS) or (isinstance(e, HttpError) and e.resp.status in RETRY_STATUSES)
+
+
+def get_response_size(response: JSON) -> int:
+    # The response has already been decoded, this is close to what was sent before compression
+    return 0 if response is None else len(json.dumps(response, separators=(',', ':')))
+
+
+def execute(request: HttpRequest, kind: CallKind, spreadsheet_id: str = '') -> JSON:
+    """
+    Executes a request once the rate limiter for its kind allows it. Requests rejected for quota
+    (or a temporary server or connection error) are retried with exponential backoff, any other
+    error is raised. Every attempt is counted against spreadsheet_id in usage.USAGE.
+    """
+    limiter = LIMITERS[kind]
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            response = request.execute()
+        except API_ERRORS as e:
+            USAGE.record(spreadsheet_id, kind, bytes_sent=getattr(request, 'body_size', 0))
+            if not is_retryable(e) or attempt == MAX_RETRIES:
+                raise
+            if isinstance(e, HttpError) and e.resp.status == 429:
+                limiter.throttle()
+            time.sleep(backoff_delay(attempt))
+        else:
+            USAGE.record(spreadsheet_id, kind, bytes_sent=getattr(request, 'body_size', 0), bytes_received=get_response_size(response))
+            limiter.recover()
+            return response
+
+
+def execute_batch(
+    requests: list[HttpRequest],
+    kind: CallKind,
+    spreadsheet_ids: list[str] | None = None
+) -> list[tuple[JSON, Exception | None]]:
+    """
+    Executes many requests using as few batch HTTP requests as possible, paced and retried like execute.
+
+    Args:
+        spreadsheet_ids: The spreadsheet each request is for, used to count calls in usage.USAGE.
+
+    Returns:
+        (response, None) for each request that succeeded and (None, error) for each one that failed,
+        in the same order as the requests.
+    """
+    results: list[tuple[JSON, Exception | None]] = [(None, None)] * len(requests)
+    if spreadsheet_ids is None:
+        spreadsheet_ids = [''] * len(requests)
+
+    def callback(request_id: str, response: JSON, exception: HttpError | None) -> None:
+        i = int(request_id)
+        results[i] = (response, exception)
+        USAGE.record(spreadsheet_ids[i], kind, bytes_sent=getattr(requests[i], 'body_size', 0), bytes_received=get_response_size(response))
+
+    limiter = LIMITERS[kind]
+    pending = list(range(len(requests)))
+    for attempt in range(MAX_RETRIES + 1):
+        for start in range(0, len(pending), MAX_BATCH_HTTP_REQUESTS):
+            chunk = pending[start:start + MAX_BATCH_HTTP_REQUESTS]
+            # Every call in a batch counts against the quota
+            limiter.acquire(len(chunk))
+
+            batch = get_service().new_batch_http_request(callback=callback)
+            for i in chunk:
+                batch.add(requests[i], request_id=str(i))
+            try:
+                batch.execute()
+            except API_ERRORS as e:
+                for i in chunk:
+                    results[i] = (None, e)
+                    USAGE.record(spreadsheet_ids[i], kind)
+            else:
+                if all(results[i][1] is None for i in chunk):
+                    limiter.recover()
+
+        failed = [i for i in pending if results[i][1] is not None]
+        pending = [i for i in failed if is_retryable(results[i][1])]
+        if not pending or attempt == MAX_RETRIES:
+            break
+
+        if any(isinstance(results[i][1], HttpError) and results[i][1].resp.status == 429 for i in pending):
+            limiter.throttle()
+        else:
+            limiter.recover()
+        time.sleep(backoff_delay(attempt))
+
+    return results
@@ -0,0 +1,699 @@
+import collections
+import copy
+import csv
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import typing
+
+import httplib2
+from googleapiclient.http import HttpError
+
+type JSON = typing.Any
+type CallKind = typing.Literal['read', 'write']
+
+# Anything a real spreadsheet would show as a blank cell
+BLANK = ''
+
+A1_REGEX = re.compile(r'^([A-Z]*)(\d*)$')
+# The rows of the ticked boxes in a column, e.g. '2,5'
+TICKED_ROWS_REGEX = re.compile(
+    r'^=IFERROR\(TEXTJOIN\(",",\s*TRUE,\s*FILTER\(ROW\(([A-Z]+)(\d+):\1\),\s*\1\2:\1=TRUE\)\),\s*""\)$'
+)
+
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def split_fields(fields: str) -> list[tuple[str, list[str] | None]]:
+    """
+    Splits a field mask such as 'userEnteredFormat(textFormat,backgroundColor),dataValidation' or
+    'userEnteredFormat.numberFormat' into (top level field, sub-fields or None for the whole field).
+    """
+    ret = []
+    depth = 0
+    current = ''
+    for char in fields + ',':
+        if char == ',' and depth == 0:
+            field = current.strip()
+            current = ''
+            if '(' in field:
+                name, sub = field[:-1].split('(', 1)
+                ret.append((name, [s.strip().split('.')[0] for s in sub.split(',')]))
+            elif '.' in field:
+                name, sub = field.split('.', 1)
+                ret.append((name, [sub.split('.')[0]]))
+            elif field:
+                ret.append((field, None))
+            continue
+        depth += char == '('
+        depth -= char == ')'
+        current += char
+    return ret
+
+
+def parse_field_mask(fields: str) -> dict[str, typing.Any]:
+    """
+    Parses a partial response field mask such as 'sheets.properties(sheetId,title),spreadsheetId'
+    into a tree of field name -> sub tree (None for the whole field).
+    """
+    ret = {}
+    depth = 0
+    current = ''
+    for char in fields + ',':
+        if char == ',' and depth == 0:
+            field = current.strip()
+            current = ''
+            if not field:
+                continue
+            dot = field.find('.')
+            paren = field.find('(')
+            if dot != -1 and (paren == -1 or dot < paren):
+                name, sub = field[:dot], parse_field_mask(field[dot + 1:])
+            elif paren != -1:
+                name, sub = field[:paren], parse_field_mask(field[paren + 1:-1])
+            else:
+                name, sub = field, None
+            if sub is not None and isinstance(ret.get(name), dict):
+                ret[name].update(sub)
+            else:
+                ret[name] = sub
+            continue
+        depth += char == '('
+        depth -= char == ')'
+        current += char
+    return ret
+
+
+def apply_field_mask(data: JSON, mask: dict[str, typing.Any] | None) -> JSON:
+    # Leaves only the fields in mask (see parse_field_mask), like the API does for the fields parameter
+    if mask is None:
+        return data
+    if isinstance(data, list):
+        return [apply_field_mask(item, mask) for item in data]
+    return {name: apply_field_mask(data[name], sub) for name, sub in mask.items() if name in data}
+
+
+def extended_value_str(value: JSON) -> str:
+    # The string values.get would show for an ExtendedValue
+    if 'boolValue' in value:
+        return 'TRUE' if value['boolValue'] else 'FALSE'
+    if 'numberValue' in value:
+        number = value['numberValue']
+        return str(int(number)) if float(number).is_integer() else str(number)
+    return str(value.get('stringValue', value.get('formulaValue', BLANK)))
+
+
+class FakeSheet:
+    def __init__(self, sheet_id: int, title: str) -> None:
+        self.sheet_id = sheet_id
+        self.title = title
+        self.frozen_row_count = 0
+        self.frozen_column_count = 0
+        self.values = {}
+        self.cells = {}
+        self.merges = []
+
+    def get_properties(self) -> JSON:
+        return {
+            'sheetId': self.sheet_id,
+            'title': self.title,
+            'index': 0,
+            'sheetType': 'GRID',
+            'gridProperties': {
+                'rowCount': max(1000, self.row_count()),
+                'columnCount': max(26, self.column_count()),
+                'frozenRowCount': self.frozen_row_count,
+                'frozenColumnCount': self.frozen_column_count
+            }
+        }
+
+    def row_count(self) -> int:
+        return max((row for row, _ in self.values), default=-1) + 1
+
+    def column_count(self) -> int:
+        return max((col for _, col in self.values), default=-1) + 1
+
+    def get_value(self, row: int, col: int) -> str:
+        value = self.values.get((row, col), BLANK)
+        if value.startswith('='):
+            return self.evaluate(value)
+        return value
+
+    def set_value(self, row: int, col: int, value: str) -> None:
+        if value == BLANK:
+            self.values.pop((row, col), None)
+        else:
+            self.values[(row, col)] = value
+
+    def evaluate(self, formula: str) -> str:
+        # Only the formulas this project writes are supported, anything else reads back as its text
+        match = TICKED_ROWS_REGEX.match(formula)
+        if match is None:
+            return formula
+        col = column_index(match.group(1))
+        rows = range(int(match.group(2)) - 1, self.row_count())
+        return ','.join(str(row + 1) for row in rows if self.values.get((row, col)) == 'TRUE')
+
+    def resolve(self, grid_range: JSON) -> tuple[range, range]:
+        """
+        Returns the rows and columns covered by a GridRange, unbounded ends stop at the last used cell.
+        """
+        rows = range(
+            grid_range.get('startRowIndex', 0),
+            grid_range.get('endRowIndex', max(self.row_count(), max((r for r, _ in self.cells), default=-1) + 1))
+        )
+        cols = range(
+            grid_range.get('startColumnIndex', 0),
+            grid_range.get('endColumnIndex', max(self.column_count(), max((c for _, c in self.cells), default=-1) + 1))
+        )
+        return rows, cols
+
+    sheet_id: int
+    title: str
+    frozen_row_count: int
+    frozen_column_count: int
+    # User entered values, (row, column) -> value as a string. Blank cells are not stored
+    values: dict[tuple[int, int], str]
+    # Everything other than the value, (row, column) -> {'userEnteredFormat': ..., 'dataValidation': ...}
+    cells: dict[tuple[int, int], dict[str, JSON]]
+    # (start row, end row, start column, end column), end exclusive
+    merges: list[tuple[int, int, int, int]]
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id: str) -> None:
+        self.spreadsheet_id = spreadsheet_id
+        self.sheets = []
+
+    def add_sheet(self, title: str, rows: list[list[str]] | None = None, sheet_id: int | None = None) -> FakeSheet:
+        """
+        Adds a sheet, optionally filled with rows of values starting at A1.
+        """
+        if sheet_id is None:
+            sheet_id = max((sheet.sheet_id for sheet in self.sheets), default=-1) + 1
+        sheet = FakeSheet(sheet_id, title)
+        for row_num, row in enumerate(rows or []):
+            for col, value in enumerate(row):
+                sheet.set_value(row_num, col, value)
+        self.sheets.append(sheet)
+        return sheet
+
+    def get_sheet(self, sheet_id: int | str) -> FakeSheet:
+        for sheet in self.sheets:
+            if sheet.sheet_id == int(sheet_id):
+                return sheet
+        raise bad_request(f'No grid with id: {sheet_id}')
+
+    def get_sheet_by_title(self, title: str) -> FakeSheet:
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet
+        raise bad_request(f'Unable to parse range: {title}')
+
+    def parse_range(self, range_name: str) -> tuple[FakeSheet, JSON]:
+        """
+        Parses an A1 range such as 'Game!A2:E', 'Game!F1' or 'Game' into a sheet and a GridRange.
+        """
+        title, _, cells = range_name.rpartition('!')
+        if title == '':
+            title, cells = cells, ''
+        sheet = self.get_sheet_by_title(title.strip("'"))
+
+        grid_range = {}
+        if cells == '':
+            return sheet, grid_range
+
+        start, _, end = cells.partition(':')
+        start_match = A1_REGEX.match(start)
+        end_match = A1_REGEX.match(end if end else start)
+        if start_match is None or end_match is None:
+            raise bad_request(f'Unable to parse range: {range_name}')
+
+        start_col, start_row = start_match.groups()
+        end_col, end_row = end_match.groups()
+        if start_col:
+            grid_range['startColumnIndex'] = column_index(start_col)
+        if start_row:
+            grid_range['startRowIndex'] = int(start_row) - 1
+        if end_col:
+            grid_range['endColumnIndex'] = column_index(end_col) + 1
+        if end_row:
+            grid_range['endRowIndex'] = int(end_row)
+        return sheet, grid_range
+
+    def get_values(self, range_name: str, major_dimension: str) -> JSON:
+        sheet, grid_range = self.parse_range(range_name)
+        rows, cols = sheet.resolve(grid_range)
+
+        values = [[sheet.get_value(row, col) for col in cols] for row in rows]
+        if major_dimension == 'COLUMNS':
+            values = [list(column) for column in zip(*values)]
+
+        # Like the real API, trailing blank cells and rows are left out
+        for line in values:
+            while line and line[-1] == BLANK:
+                line.pop()
+        while values and not values[-1]:
+            values.pop()
+
+        ret = {'range': range_name, 'majorDimension': major_dimension}
+        if values:
+            ret['values'] = values
+        return ret
+
+    def clear_values(self, range_name: str) -> JSON:
+        sheet, grid_range = self.parse_range(range_name)
+        rows, cols = sheet.resolve(grid_range)
+        for row in rows:
+            for col in cols:
+                sheet.set_value(row, col, BLANK)
+        return {'spreadsheetId': self.spreadsheet_id, 'clearedRange': range_name}
+
+    def get(self, fields: str | None = None) -> JSON:
+        # Roughly what the real API returns for a spreadsheet without grid data
+        ret = {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {
+                'title': self.spreadsheet_id,
+                'locale': 'en_US',
+                'autoRecalc': 'ON_CHANGE',
+                'timeZone': 'America/Toronto',
+                'defaultFormat': {
+                    'backgroundColor': {'red': 1, 'green': 1, 'blue': 1},
+                    'padding': {'top': 2, 'right': 3, 'bottom': 2, 'left': 3},
+                    'verticalAlignment': 'BOTTOM',
+                    'wrapStrategy': 'OVERFLOW_CELL',
+                    'textFormat': {
+                        'foregroundColor': {}, 'fontFamily': 'arial,sans,sans-serif', 'fontSize': 10,
+                        'bold': False, 'italic': False, 'strikethrough': False, 'underline': False
+                    }
+                }
+            },
+            'sheets': [
+                {
+                    'properties': sheet.get_properties(),
+                    'merges': [
+                        {'sheetId': sheet.sheet_id, 'startRowIndex': r0, 'endRowIndex': r1, 'startColumnIndex': c0, 'endColumnIndex': c1}
+                        for r0, r1, c0, c1 in sheet.merges
+                    ]
+                }
+                for sheet in self.sheets
+            ],
+            'spreadsheetUrl': f'https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}/edit'
+        }
+        return ret if fields is None else apply_field_mask(ret, parse_field_mask(fields))
+
+    def batch_update(self, body: JSON) -> JSON:
+        # Like the real API, a batch is applied all or nothing
+        saved = copy.deepcopy(self.sheets)
+        replies = []
+        try:
+            for request in body.get('requests', []):
+                if len(request) != 1:
+                    raise bad_request('Each request must set exactly one kind of request')
+                kind, params = next(iter(request.items()))
+                handler = getattr(self, f'_{kind}', None)
+                if handler is None:
+                    raise bad_request(f'Request type not supported by the emulator: {kind}')
+                handler(params)
+                replies.append({})
+        except Exception:
+            # Undo the requests applied so far in place, so anything holding a sheet still sees it
+            for sheet, saved_sheet in zip(self.sheets, saved):
+                vars(sheet).update(vars(saved_sheet))
+            raise
+        return {'spreadsheetId': self.spreadsheet_id, 'replies': replies}
+
+    @staticmethod
+    def apply_fields(cell: dict[str, JSON], data: JSON | None, fields: str) -> None:
+        # Sets the given fields of a cell from data (CellData), fields missing from data are cleared
+        data = data or {}
+        for name, sub_fields in split_fields(fields):
+            if name == 'userEnteredValue':
+                continue  # Values are stored separately, see apply_value
+            if sub_fields is None:
+                if name in data:
+                    cell[name] = data[name]
+                else:
+                    cell.pop(name, None)
+                continue
+
+            current = dict(cell.get(name, {}))
+            for sub_field in sub_fields:
+                if sub_field in data.get(name, {}):
+                    current[sub_field] = data[name][sub_field]
+                else:
+                    current.pop(sub_field, None)
+            cell[name] = current
+
+    @staticmethod
+    def apply_value(sheet: FakeSheet, row: int, col: int, data: JSON | None, fields: str) -> None:
+        if any(name == 'userEnteredValue' for name, _ in split_fields(fields)):
+            value = (data or {}).get('userEnteredValue')
+            sheet.set_value(row, col, BLANK if value is None else extended_value_str(value))
+
+    def update_cells(self, sheet: FakeSheet, rows: range, cols: range, data: list[list[JSON]] | None, fields: str) -> None:
+        for i, row in enumerate(rows):
+            for j, col in enumerate(cols):
+                # Like the real API, fields of cells in the range that data doesn't cover are cleared
+                cell_data = None
+                if data is not None and i < len(data) and j < len(data[i]):
+                    cell_data = data[i][j]
+                cell = self.cells_at(sheet, row, col)
+                FakeSpreadsheet.apply_fields(cell, cell_data, fields)
+                FakeSpreadsheet.apply_value(sheet, row, col, cell_data, fields)
+
+    @staticmethod
+    def cells_at(sheet: FakeSheet, row: int, col: int) -> dict[str, JSON]:
+        return sheet.cells.setdefault((row, col), {})
+
+    def _pasteData(self, params: JSON) -> None:
+        coordinate = params['coordinate']
+        sheet = self.get_sheet(coordinate.get('sheetId', 0))
+        row = coordinate.get('rowIndex', 0)
+        col = coordinate.get('columnIndex', 0)
+        for i, line in enumerate(csv.reader(params['data'].split('\n'), delimiter=params.get('delimiter', ','))):
+            for j, value in enumerate(line):
+                sheet.set_value(row + i, col + j, value)
+
+    def _repeatCell(self, params: JSON) -> None:
+        sheet = self.get_sheet(params['range'].get('sheetId', 0))
+        rows, cols = sheet.resolve(params['range'])
+        self.update_cells(sheet, rows, cols, [[params.get('cell', {})] * len(cols)] * len(rows), params['fields'])
+
+    def _updateCells(self, params: JSON) -> None:
+        data = None
+        if 'rows' in params:
+            data = [row.get('values', []) for row in params['rows']]
+
+        if 'start' in params:
+            # Only the cells data covers are written
+            start = params['start']
+            sheet = self.get_sheet(start.get('sheetId', 0))
+            for i, row_data in enumerate(data or []):
+                for j, cell_data in enumerate(row_data):
+                    row, col = start.get('rowIndex', 0) + i, start.get('columnIndex', 0) + j
+                    FakeSpreadsheet.apply_fields(self.cells_at(sheet, row, col), cell_data, params['fields'])
+                    FakeSpreadsheet.apply_value(sheet, row, col, cell_data, params['fields'])
+            return
+
+        sheet = self.get_sheet(params['range'].get('sheetId', 0))
+        rows, cols = sheet.resolve(params['range'])
+        self.update_cells(sheet, rows, cols, data, params['fields'])
+
+    def _setDataValidation(self, params: JSON) -> None:
+        sheet = self.get_sheet(params['range'].get('sheetId', 0))
+        rows, cols = sheet.resolve(params['range'])
+        data = {'dataValidation': params['rule']} if 'rule' in params else {}
+        self.update_cells(sheet, rows, cols, [[data] * len(cols)] * len(rows), 'dataValidation')
+
+    def _mergeCells(self, params: JSON) -> None:
+        grid_range = params['range']
+        sheet = self.get_sheet(grid_range.get('sheetId', 0))
+        rows, cols = sheet.resolve(grid_range)
+        merge = (rows.start, rows.stop, cols.start, cols.stop)
+        for other in sheet.merges:
+            if merge[0] < other[1] and other[0] < merge[1] and merge[2] < other[3] and other[2] < merge[3]:
+                raise bad_request('You can\'t merge cells that are already merged')
+        sheet.merges.append(merge)
+
+    def _unmergeCells(self, params: JSON) -> None:
+        grid_range = params['range']
+        sheet = self.get_sheet(grid_range.get('sheetId', 0))
+        rows, cols = sheet.resolve(grid_range)
+        sheet.merges = [
+            merge for merge in sheet.merges
+            if not (merge[0] < rows.stop and rows.start < merge[1] and merge[2] < cols.stop and cols.start < merge[3])
+        ]
+
+    def _updateSheetProperties(self, params: JSON) -> None:
+        properties = params['properties']
+        sheet = self.get_sheet(properties.get('sheetId', 0))
+        grid_properties = properties.get('gridProperties', {})
+        for name, sub_fields in split_fields(params['fields']):
+            if name == 'title':
+                sheet.title = properties['title']
+            elif name == 'gridProperties':
+                for sub_field in sub_fields or grid_properties.keys():
+                    if sub_field == 'frozenRowCount':
+                        sheet.frozen_row_count = grid_properties.get('frozenRowCount', 0)
+                    elif sub_field == 'frozenColumnCount':
+                        sheet.frozen_column_count = grid_properties.get('frozenColumnCount', 0)
+
+    spreadsheet_id: str
+    sheets: list[FakeSheet]
+
+
+def http_error(status: int, message: str) -> HttpError:
+    content = json.dumps({'error': {'code': status, 'message': message}}).encode('utf-8')
+    return HttpError(httplib2.Response({'status': status}), content)
+
+
+def bad_request(message: str) -> HttpError:
+    return http_error(400, message)
+
+
+class FakeRequest:
+    """
+    Like googleapiclient's HttpRequest, the body is kept serialised, so it can be compressed
+    (see client.compress) before the request is executed. call is given the decoded body.
+    """
+
+    def __init__(self, emulator: 'SheetsEmulator', kind: CallKind, method: str, call: typing.Callable[[JSON], JSON], body: JSON = None) -> None:
+        self.emulator = emulator
+        self.kind = kind
+        self.method = method
+        self.call = call
+        self.body = None if body is None else json.dumps(body)
+        self.body_size = len(self.body or '')
+        self.headers = {}
+
+    def get_body(self) -> JSON:
+        # The body as the server sees it
+        if self.body is None:
+            return None
+        body = self.body
+        if self.headers.get('content-encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+    def execute(self, http: typing.Any = None, num_retries: int = 0) -> JSON:
+        return self.emulator.execute(self)
+
+    emulator: 'SheetsEmulator'
+    kind: CallKind
+    method: str
+    call: typing.Callable[[JSON], JSON]
+    body: str | bytes | None
+    body_size: int
+    headers: dict[str, str]
+
+
+class FakeBatch:
+    def __init__(self, emulator: 'SheetsEmulator', callback: typing.Callable | None) -> None:
+        self.emulator = emulator
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request: FakeRequest, callback: typing.Callable | None = None, request_id: str | None = None) -> None:
+        if request_id is None:
+            request_id = str(len(self.requests) + 1)
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self, http: typing.Any = None) -> None:
+        self.emulator.execute_batch(self)
+
+    emulator: 'SheetsEmulator'
+    callback: typing.Callable | None
+    requests: list[tuple[str, FakeRequest, typing.Callable | None]]
+
+
+class FakeValues:
+    def __init__(self, emulator: 'SheetsEmulator') -> None:
+        self.emulator = emulator
+
+    def get(self, spreadsheetId: str, range: str, majorDimension: str = 'ROWS', **kwargs) -> FakeRequest:
+        return FakeRequest(self.emulator, 'read', 'values.get', lambda body: self.emulator.get_spreadsheet(spreadsheetId).get_values(range, majorDimension))
+
+    def batchGet(self, spreadsheetId: str, ranges: list[str], majorDimension: str = 'ROWS', **kwargs) -> FakeRequest:
+        def call(body: JSON) -> JSON:
+            spreadsheet = self.emulator.get_spreadsheet(spreadsheetId)
+            return {
+                'spreadsheetId': spreadsheetId,
+                'valueRanges': [spreadsheet.get_values(range_name, majorDimension) for range_name in ranges]
+            }
+        return FakeRequest(self.emulator, 'read', 'values.batchGet', call)
+
+    def clear(self, spreadsheetId: str, range: str, body: JSON = None, **kwargs) -> FakeRequest:
+        return FakeRequest(self.emulator, 'write', 'values.clear', lambda body: self.emulator.get_spreadsheet(spreadsheetId).clear_values(range))
+
+    emulator: 'SheetsEmulator'
+
+
+class FakeSpreadsheets:
+    def __init__(self, emulator: 'SheetsEmulator') -> None:
+        self.emulator = emulator
+
+    def get(self, spreadsheetId: str, fields: str | None = None, **kwargs) -> FakeRequest:
+        return FakeRequest(self.emulator, 'read', 'spreadsheets.get', lambda body: self.emulator.get_spreadsheet(spreadsheetId).get(fields))
+
+    def batchUpdate(self, spreadsheetId: str, body: JSON, **kwargs) -> FakeRequest:
+        return FakeRequest(self.emulator, 'write', 'spreadsheets.batchUpdate', lambda body: self.emulator.get_spreadsheet(spreadsheetId).batch_update(body), body)
+
+    def values(self) -> FakeValues:
+        return FakeValues(self.emulator)
+
+    emulator: 'SheetsEmulator'
+
+
+class SheetsEmulator:
+    """
+    An in-memory stand in for the Sheets API client (the object returned by build('sheets', 'v4')),
+    for testing and benchmarking without a network. Supports the calls google_sheets makes. Use it with
+    client.set_service_factory(lambda: emulator).
+
+    Args:
+        latency: Seconds each HTTP call takes, a batch HTTP request counts as one call.
+        error_rate: Chance (0 to 1) of any call failing with a 503.
+        read_quota_per_minute: Reads allowed in any 60 seconds before calls fail with a 429, None for no limit.
+        write_quota_per_minute: Same as read_quota_per_minute, for writes.
+        seed: Seed for the generator deciding which calls fail.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        read_quota_per_minute: int | None = None,
+        write_quota_per_minute: int | None = None,
+        seed: int | None = None
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quotas = {'read': read_quota_per_minute, 'write': write_quota_per_minute}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.spreadsheets_by_id = {}
+        self.call_times = {'read': collections.deque(), 'write': collections.deque()}
+        self.calls = collections.Counter()
+        self.errors = collections.Counter()
+        self.http_requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def add_spreadsheet(self, spreadsheet_id: str, sheets: dict[str, list[list[str]]]) -> FakeSpreadsheet:
+        """
+        Adds a spreadsheet with the given sheets (title -> rows of values starting at A1).
+        """
+        spreadsheet = FakeSpreadsheet(spreadsheet_id)
+        for title, rows in sheets.items():
+            spreadsheet.add_sheet(title, rows)
+        with self.lock:
+            self.spreadsheets_by_id[spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def add_game(self, master_spreadsheet_id: str, num_teams: int, num_power_ups: int = 20) -> list[str]:
+        """
+        Adds a master spreadsheet with made up objectives, wild cards, power-ups and curses, and num_teams
+        empty team spreadsheets. Returns the team spreadsheet IDs.
+        """
+        self.add_spreadsheet(master_spreadsheet_id, {
+            'Objectives': [['Objective']] + [[f'Objective {i}'] for i in range(100)],
+            'Wild Cards': [['Wild Card']] + [[f'Wild Card {i}'] for i in range(10)],
+            'Power-ups': [['Power-up']] + [[f'Power-up {i}'] for i in range(num_power_ups)],
+            'Curses': [['Curse']] + [[f'Curse {i}'] for i in range(30)]
+        })
+
+        team_ids = [f'team-{i}' for i in range(num_teams)]
+        for team_id in team_ids:
+            self.add_spreadsheet(team_id, {'Game': []})
+        return team_ids
+
+    def get_spreadsheet(self, spreadsheet_id: str) -> FakeSpreadsheet:
+        spreadsheet = self.spreadsheets_by_id.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise http_error(404, 'Requested entity was not found.')
+        return spreadsheet
+
+    # Methods of the API client
+    def spreadsheets(self) -> FakeSpreadsheets:
+        return FakeSpreadsheets(self)
+
+    def new_batch_http_request(self, callback: typing.Callable | None = None) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+    def __check_quota(self, kind: CallKind, now: float) -> bool:
+        quota = self.quotas[kind]
+        times = self.call_times[kind]
+        while times and times[0] <= now - 60:
+            times.popleft()
+        if quota is not None and len(times) >= quota:
+            return False
+        times.append(now)
+        return True
+
+    def __call(self, request: FakeRequest) -> JSON:
+        with self.lock:
+            self.calls[request.method] += 1
+            self.bytes_sent += request.body_size
+
+            if not self.__check_quota(request.kind, time.monotonic()):
+                self.errors[429] += 1
+                raise http_error(429, f'Quota exceeded for quota metric \'{request.kind.capitalize()} requests\'')
+            if self.random.random() < self.error_rate:
+                self.errors[503] += 1
+                raise http_error(503, 'The service is currently unavailable.')
+
+            response = request.call(request.get_body())
+            self.bytes_received += len(json.dumps(response))
+            return response
+
+    def execute(self, request: FakeRequest) -> JSON:
+        with self.lock:
+            self.http_requests += 1
+        time.sleep(self.latency)
+        return self.__call(request)
+
+    def execute_batch(self, batch: FakeBatch) -> None:
+        with self.lock:
+            self.http_requests += 1
+        time.sleep(self.latency)
+        for request_id, request, callback in batch.requests:
+            try:
+                response = self.__call(request)
+            except HttpError as e:
+                if callback is not None:
+                    callback(request_id, None, e)
+            else:
+                if callback is not None:
+                    callback(request_id, response, None)
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.calls.clear()
+            self.errors.clear()
+            self.http_requests = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    latency: float
+    error_rate: float
+    quotas: dict[CallKind, int | None]
+    random: random.Random
+    lock: threading.Lock
+    spreadsheets_by_id: dict[str, FakeSpreadsheet]
+    call_times: dict[CallKind, collections.deque[float]]
+    # API method -> number of calls, and status -> number of injected errors
+    calls: collections.Counter[str]
+    errors: collections.Counter[int]
+    http_requests: int
+    bytes_sent: int
+    bytes_received: int
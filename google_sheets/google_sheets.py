@@ -1,23 +1,19 @@
-import json
+import collections
+import re
+import threading
 import typing
-import string
 from datetime import datetime
-from pathlib import Path
 
-from oauth2client.service_account import ServiceAccountCredentials
-from googleapiclient.discovery import build
-from googleapiclient.http import HttpError
+from googleapiclient.http import HttpRequest
 
-PACKAGE_DIR = Path(__file__).parent
+from .client import API_ERRORS, TRANSPORT_ERRORS, chunk_requests, compress, execute, execute_batch, get_service
+from .request_templates import RequestFragment, get_template
+from .usage import USAGE
 
 if typing.TYPE_CHECKING:
     # As per sheets API docs, pylance doesn't like this but it is required
     from googleapiclient._apis.sheets.v4 import SheetsResource  # type: ignore
 
-SERV_ACC_PATH = PACKAGE_DIR / 'GServAcc'  # NOTE: Modify as necessary
-
-SCOPES = 'https://www.googleapis.com/auth/spreadsheets'
-
 class RGBA:
     def __init__(self, red: int, green: int, blue: int, alpha: int):
         self.red = red
@@ -51,26 +47,211 @@ ALIGNMENT_DICT: dict[CellAlignment, str] = {
 type JSON = typing.Any
 
 
+class CellStyle:
+    """
+    Everything about how a cell looks. Styles are interned: get returns the same object for the same
+    arguments, so styles can be compared with `is` and every cell with the same look shares one object.
+    Styles must not be modified.
+    """
+
+    __interned: dict[tuple, 'CellStyle'] = {}
+
+    @staticmethod
+    def get(
+        font_size: int = 10,
+        text_colour: Colour = 'Black',
+        cell_colour: Colour = 'White',
+        bold: bool = False,
+        italic: bool = False,
+        length: int = 1,
+        alignment: CellAlignment = 'Left',
+        datetime: str | None = None,
+        checkbox: bool = False,
+        strikethrough: bool = False
+    ) -> 'CellStyle':
+        key = (font_size, text_colour, cell_colour, bold, italic, length, alignment, datetime, checkbox, strikethrough)
+        style = CellStyle.__interned.get(key)
+        if style is None:
+            # Finished before it is published, another thread may get it as soon as it is
+            style = CellStyle(*key)
+            if length == 1 and datetime is None and not checkbox:
+                style.format_style = style
+            else:
+                style.format_style = CellStyle.get(
+                    font_size, text_colour, cell_colour, bold, italic, alignment=alignment, strikethrough=strikethrough
+                )
+            style = CellStyle.__interned.setdefault(key, style)
+        return style
+
+    def __init__(
+        self,
+        font_size: int,
+        text_colour: Colour,
+        cell_colour: Colour,
+        bold: bool,
+        italic: bool,
+        length: int,
+        alignment: CellAlignment,
+        datetime: str | None,
+        checkbox: bool,
+        strikethrough: bool
+    ) -> None:
+        # NOTE: Use CellStyle.get instead of constructing styles directly
+        self.font_size = font_size
+        self.text_colour = text_colour
+        self.cell_colour = cell_colour
+        self.bold = bold
+        self.italic = italic
+        self.length = length
+        self.alignment = alignment
+        self.datetime = datetime
+        self.checkbox = checkbox
+        self.strikethrough = strikethrough
+
+    def get_format_request(self, sheet_id: int, start_row: int, end_row: int, start_col: int, end_col: int) -> JSON:
+        background = COLOUR_DICT.get(self.cell_colour)
+        text = COLOUR_DICT.get(self.text_colour)
+        return get_template('format_request_template.json').render(
+            SheetId = sheet_id,
+            StartRowIndex = start_row,
+            EndRowIndex = end_row,
+            StartColIndex = start_col,
+            EndColIndex = end_col,
+            BackgroundRed = float(background.red/255),
+            BackgroundGreen = float(background.green/255),
+            BackgroundBlue = float(background.blue/255),
+            BackgroundAlpha = float(background.alpha),
+            TextAlignment = ALIGNMENT_DICT.get(self.alignment),
+            TextRed = float(text.red/255),
+            TextGreen = float(text.green/255),
+            TextBlue = float(text.blue/255),
+            TextAlpha = float(text.alpha),
+            FontSize = self.font_size,
+            TextBold = self.bold,
+            TextItalic = self.italic,
+            Strikethrough = self.strikethrough
+        )
+
+    def get_checkbox_request(self, sheet_id: int, start_row: int, end_row: int, start_col: int, end_col: int) -> JSON:
+        return get_template('checkbox_request_template.json').render(
+            SheetId = sheet_id,
+            StartRowIndex = start_row,
+            EndRowIndex = end_row,
+            StartColIndex = start_col,
+            EndColIndex = end_col
+        )
+
+    def get_merge_request(self, sheet_id: int, row: int, column: int) -> JSON:
+        return get_template('merge_cell_request_template.json').render(
+            SheetId = sheet_id,
+            StartRowIndex = row,
+            EndRowIndex = row + 1,
+            StartColIndex = column,
+            EndColIndex = column + self.length
+        )
+
+    def get_datetime_request(self, sheet_id: int, start_row: int, end_row: int, start_col: int, end_col: int) -> JSON:
+        if self.datetime is not None:
+            return get_template('datetime_format_request_template.json').render(
+                SheetId = sheet_id,
+                StartRowIndex = start_row,
+                EndRowIndex = end_row,
+                StartColIndex = start_col,
+                EndColIndex = end_col,
+                DateTimePattern = self.datetime
+            )
+        else:
+            return {}
+
+    __slots__ = (
+        'font_size', 'text_colour', 'cell_colour', 'bold', 'italic', 'length', 'alignment', 'datetime', 'checkbox',
+        'strikethrough', 'format_style'
+    )
+
+    font_size: int
+    text_colour: Colour
+    cell_colour: Colour
+    bold: bool
+    italic: bool
+    length: int
+    alignment: CellAlignment
+    datetime: str | None
+    checkbox: bool
+    strikethrough: bool
+    # The same style without merging, date/time or checkbox, i.e. only what the format request sets
+    format_style: 'CellStyle'
+
+
+DEFAULT_STYLE = CellStyle.get()
+
+
+def coalesce_ranges(grid: list[list[typing.Hashable | None]]) -> list[tuple[int, int, int, int, typing.Hashable]]:
+    """
+    Groups equal keys in a grid (rows of keys, None for cells to leave out) into rectangles, so one
+    request can cover many cells. Runs of equal keys down each column are found first, then runs that
+    cover the same rows in neighbouring columns are joined.
+
+    Returns:
+        (start row, end row, start column, end column, key) for each rectangle, ends exclusive.
+    """
+    def key_at(row: int, col: int) -> typing.Hashable | None:
+        return grid[row][col] if row < len(grid) and col < len(grid[row]) else None
+
+    # (start row, end row, key) -> columns with that run, in order
+    runs: dict[tuple[int, int, typing.Hashable], list[int]] = {}
+    num_cols = max((len(row) for row in grid), default=0)
+    for col in range(num_cols):
+        start = 0
+        for row in range(1, len(grid) + 1):
+            if row == len(grid) or key_at(row, col) != key_at(start, col):
+                if key_at(start, col) is not None:
+                    runs.setdefault((start, row, key_at(start, col)), []).append(col)
+                start = row
+
+    ret = []
+    for (start_row, end_row, key), cols in runs.items():
+        start_col = cols[0]
+        for col, next_col in zip(cols, cols[1:] + [None]):
+            if next_col != col + 1:
+                ret.append((start_row, end_row, start_col, col + 1, key))
+                start_col = next_col
+    return ret
+
+
+# Data that Sheets reads as a number when typed into a cell
+NUMBER_REGEX = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+# Sheets stores dates and times as the number of days since this date
+SHEETS_EPOCH = datetime(1899, 12, 30)
+
+# All GoogleSheets needs to know about the sheets in a spreadsheet, the rest of spreadsheets.get is never read
+METADATA_FIELDS = 'sheets.properties(sheetId,title,gridProperties)'
+
+# Requests that change which sheets there are or their properties, see GoogleSheets.invalidate_metadata
+STRUCTURAL_REQUESTS = ('addSheet', 'deleteSheet', 'duplicateSheet', 'updateSheetProperties')
+
+
 class Cell:
     @staticmethod
-    def format_data_str(data: str) -> str:
-        # Refer to this string as an example of how we must format to make the CSV and JSON happy
-        # f'=HYPERLINK("{TBA_LINK_PREFIX}/event/{division}#rankings", "Full Rankings")' must become
-        # f'\\"=HYPERLINK(\\"\\"{TBA_LINK_PREFIX}/event/{division}#rankings\\"\\", \\"\\"Full Rankings\\"\\")\\"'
-        # We reformat strings in this manner in this function
-
-        comma = data.count(',') > 0 or data.count('-') > 0
-        escape = '\\"\\' if comma else '\\'
-
-        offset = 0
-        while (x := data.find('"', offset)) != -1:
-            data = data[:x] + escape + data[x:]
-            offset = x + len(escape) + 1  # +1 so we move past this comma to next char
-
-        if comma:
-            data = f'\\"{data}\\"'
-        
-        return data
+    def get_extended_value(data: str, is_datetime: bool = False) -> JSON | None:
+        """
+        Returns data as the ExtendedValue Sheets would store if it was typed into a cell, or None for
+        an empty cell. Values are sent already typed, so nothing has to be escaped.
+        """
+        if data == '':
+            return None
+        if data.startswith('='):
+            return {'formulaValue': data}
+        if data.upper() in ('TRUE', 'FALSE'):
+            return {'boolValue': data.upper() == 'TRUE'}
+        if NUMBER_REGEX.fullmatch(data):
+            return {'numberValue': float(data)}
+        if is_datetime:
+            try:
+                return {'numberValue': (datetime.fromisoformat(data) - SHEETS_EPOCH).total_seconds() / 86400}
+            except ValueError:
+                pass
+        return {'stringValue': data}
 
     def __init__(
         self,
@@ -92,20 +273,13 @@ class Cell:
         if length < 1:
             raise NotImplementedError('Cell length must be at least one')
 
-        self.data = Cell.format_data_str(data)
+        self.data = data
         self.sheet_id = sheet_id
         self.row = row
         self.column = column
-        self.font_size = font_size
-        self.text_colour = text_colour
-        self.cell_colour = cell_colour
-        self.bold = bold
-        self.italic = italic
-        self.length = length
-        self.alignment = alignment
-        self.datetime = datetime
-        self.checkbox = checkbox
-        self.strikethrough = strikethrough
+        self.style = CellStyle.get(
+            font_size, text_colour, cell_colour, bold, italic, length, alignment, datetime, checkbox, strikethrough
+        )
 
     def __eq__(self, other):
         if not isinstance(other, Cell):
@@ -116,85 +290,83 @@ class Cell:
                 self.sheet_id == other.sheet_id and
                 self.row == other.row and
                 self.column == other.column and
-                self.font_size == other.font_size and
-                self.text_colour == other.text_colour and
-                self.cell_colour == other.cell_colour and
-                self.bold == other.bold and
-                self.italic == other.italic and
-                self.length == other.length and
-                self.alignment == other.alignment and
-                self.datetime == other.datetime and
-                self.checkbox == other.checkbox and
-                self.strikethrough == other.strikethrough
+                self.style is other.style
             )
 
+    def at(self, sheet_id: int, row: int, column: int) -> 'Cell':
+        """
+        Returns a copy of this cell at the given position. Cells in a Row or Sheet don't keep track of
+        their own position, it is worked out when requests are generated.
+        """
+        cell = object.__new__(Cell)
+        cell.data = self.data
+        cell.style = self.style
+        cell.sheet_id = sheet_id
+        cell.row = row
+        cell.column = column
+        return cell
+
+    # The style of a cell is shared with every other cell that looks the same, so it can't be modified
+    font_size = property(lambda self: self.style.font_size)
+    text_colour = property(lambda self: self.style.text_colour)
+    cell_colour = property(lambda self: self.style.cell_colour)
+    bold = property(lambda self: self.style.bold)
+    italic = property(lambda self: self.style.italic)
+    length = property(lambda self: self.style.length)
+    alignment = property(lambda self: self.style.alignment)
+    datetime = property(lambda self: self.style.datetime)
+    checkbox = property(lambda self: self.style.checkbox)
+    strikethrough = property(lambda self: self.style.strikethrough)
+
     def get_format_request(self) -> JSON:
-        with open(PACKAGE_DIR / 'format_request_template.json', 'r', encoding='utf-8') as f:
-            template = string.Template(f.read())
-        return json.loads(template.substitute(
-            SheetId = self.sheet_id,
-            StartRowIndex = self.row,
-            EndRowIndex = self.row + 1,
-            StartColIndex = self.column,
-            EndColIndex = self.column + 1,
-            BackgroundRed = str(float(COLOUR_DICT.get(self.cell_colour).red/255)),
-            BackgroundGreen = str(float(COLOUR_DICT.get(self.cell_colour).green/255)),
-            BackgroundBlue = str(float(COLOUR_DICT.get(self.cell_colour).blue/255)),
-            BackgroundAlpha = str(float(COLOUR_DICT.get(self.cell_colour).alpha)),
-            TextAlignment = ALIGNMENT_DICT.get(self.alignment),
-            TextRed = str(float(COLOUR_DICT.get(self.text_colour).red/255)),
-            TextGreen = str(float(COLOUR_DICT.get(self.text_colour).green/255)),
-            TextBlue = str(float(COLOUR_DICT.get(self.text_colour).blue/255)),
-            TextAlpha = str(float(COLOUR_DICT.get(self.text_colour).alpha)),
-            FontSize = self.font_size,
-            TextBold = 'true' if self.bold else 'false',
-            TextItalic = 'true' if self.italic else 'false',
-            Strikethrough = 'true' if self.strikethrough else 'false'
-        ))
+        return self.style.get_format_request(self.sheet_id, self.row, self.row + 1, self.column, self.column + 1)
     
     def get_checkbox_request(self) -> JSON:
-        with open(PACKAGE_DIR / 'checkbox_request_template.json', 'r', encoding='utf-8') as f:
-            template = string.Template(f.read())
-        return json.loads(template.substitute(
+        return self.style.get_checkbox_request(self.sheet_id, self.row, self.row + 1, self.column, self.column + 1)
+    
+    def get_merge_request(self) -> JSON:
+        return self.style.get_merge_request(self.sheet_id, self.row, self.column)
+    
+    def get_datetime_request(self) -> JSON:
+        return self.style.get_datetime_request(self.sheet_id, self.row, self.row + 1, self.column, self.column + 1)
+    
+    def get_cell_data(self) -> JSON:
+        # CellData with only the value set, formats are sent separately (and coalesced) by Sheet
+        value = Cell.get_extended_value(self.data, self.style.datetime is not None)
+        return {} if value is None else {'userEnteredValue': value}
+
+    def get_data_request(self) -> JSON:
+        return get_template('data_request_template.json').render(
+            Rows = [{'values': [self.get_cell_data()]}],
+            SheetId = self.sheet_id,
+            RowIndex = self.row,
+            ColumnIndex = self.column
+        )
+
+    def get_clear_request(self, fields: str) -> JSON:
+        return get_template('clear_request_template.json').render(
             SheetId = self.sheet_id,
             StartRowIndex = self.row,
             EndRowIndex = self.row + 1,
             StartColIndex = self.column,
-            EndColIndex = self.column + 1
-        ))
-    
-    def get_merge_request(self) -> JSON:
-        with open(PACKAGE_DIR / 'merge_cell_request_template.json', 'r', encoding='utf-8') as f:
-            template = string.Template(f.read())
-        return json.loads(template.substitute(
+            EndColIndex = self.column + self.length,
+            Fields = fields
+        )
+
+    def get_unmerge_request(self) -> JSON:
+        return get_template('unmerge_cell_request_template.json').render(
             SheetId = self.sheet_id,
             StartRowIndex = self.row,
             EndRowIndex = self.row + 1,
             StartColIndex = self.column,
             EndColIndex = self.column + self.length
-        ))
-    
-    def get_datetime_request(self) -> JSON:
-        if self.datetime is not None:
-            with open(PACKAGE_DIR / 'datetime_format_request_template.json', 'r', encoding='utf-8') as f:
-                template = string.Template(f.read())
-            return json.loads(template.substitute(
-                SheetId = self.sheet_id,
-                StartRowIndex = self.row,
-                EndRowIndex = self.row + 1,
-                StartColIndex = self.column,
-                EndColIndex = self.column + 1,
-                DateTimePattern = self.datetime
-            ))
-        else:
-            return {}
-    
-    def get_requests(self) -> list[JSON]:
+        )
+
+    def has_same_format(self, other: 'Cell') -> bool:
+        return self.style is other.style
+
+    def get_format_requests(self) -> list[JSON]:
         ret = []
-        DEFAULT_FORMAT = Cell(data=self.data, sheet_id=self.sheet_id, row=self.row, column=self.column)
-        if self == DEFAULT_FORMAT:
-            return ret
-        
         if self.length != 1:
             # NOTE: Length < 1 prevented in constructor
             # Length > 1 means we need to merge cells
@@ -207,27 +379,69 @@ class Cell:
         if self.checkbox:
             ret.append(self.get_checkbox_request())
 
-        # Format is different
         ret.append(self.get_format_request())
 
         return ret
 
+    def get_requests(self) -> list[JSON]:
+        if self.style is DEFAULT_STYLE:
+            return []
+
+        # Format is different
+        return self.get_format_requests()
+
+    def get_undo_requests(self, previous: 'Cell') -> list[JSON]:
+        """
+        Returns the requests that undo anything from the format of previous (the cell last written at this
+        position) that writing this cell won't overwrite. They must be sent before the requests from
+        get_diff_requests of any cell in the sheet, e.g. a merge can overlap a neighbour's old merge.
+        """
+        ret = []
+        if self.has_same_format(previous):
+            return ret
+
+        if previous.length != 1:
+            ret.append(previous.get_unmerge_request())
+        if previous.datetime is not None and self.datetime is None:
+            ret.append(previous.get_clear_request('userEnteredFormat.numberFormat'))
+        if previous.checkbox and not self.checkbox:
+            ret.append(previous.get_clear_request('dataValidation'))
+        return ret
+
+    def get_diff_requests(self, previous: 'Cell') -> list[JSON]:
+        """
+        Returns the requests needed to turn previous (the cell last written at this position) into this cell,
+        once the requests from get_undo_requests have been sent.
+        """
+        ret = []
+        if self.data != previous.data:
+            # Writing an empty cell clears the previous value
+            ret.append(self.get_data_request())
+
+        if not self.has_same_format(previous):
+            ret += self.get_format_requests()
+
+        return ret
+
+    __slots__ = ('data', 'sheet_id', 'row', 'column', 'style')
 
     sheet_id: int
     row: int
     column: int
 
     data: str
-    font_size: int
-    text_colour: Colour
-    cell_colour: Colour
-    bold: bool
-    italic: bool
-    length: int
-    alignment: CellAlignment
-    datetime: str | None
-    checkbox: bool
-    strikethrough: bool
+    style: 'CellStyle'
+
+
+BLANK_CELL = Cell('')
+
+# Requests for whole sheets are kept for this many layouts (see Sheet.get_requests), False to always build them
+CACHE_LAYOUTS = True
+LAYOUT_CACHE_SIZE = 32
+
+# Sheet.get_layout() -> requests for a sheet with that layout, least recently used first
+layout_cache: collections.OrderedDict[tuple, RequestFragment] = collections.OrderedDict()
+layout_cache_lock = threading.Lock()
 
 
 class Row:
@@ -243,42 +457,31 @@ class Row:
         for cell in cells:
             self.append_cell(cell)
 
-    def get_csv_data(self):
-        csv = ''
-        for cell in self.cells:
-            csv += cell.data + ','
-
-        # Remove trailing comma if data in csv
-        return csv[:-1] if csv != '' else ','
+    def get_row_data(self) -> JSON:
+        return {'values': [cell.get_cell_data() for cell in self.cells]}
     
-    def get_data_request(self) -> JSON:
-        with open(PACKAGE_DIR / 'data_request_template.json', 'r', encoding='utf-8') as f:
-            template = string.Template(f.read())
-        return json.loads(template.substitute(
-            CsvData = self.get_csv_data(),
-            SheetId = self.sheet_id,
-            RowIndex = self.row
-        ))
+    def get_data_request(self, sheet_id: int | None = None, row: int | None = None) -> JSON:
+        """
+        Args:
+            sheet_id, row: Where the row is, defaults to the row's own sheet_id and row.
+        """
+        return get_template('data_request_template.json').render(
+            Rows = [self.get_row_data()],
+            SheetId = self.sheet_id if sheet_id is None else sheet_id,
+            RowIndex = self.row if row is None else row,
+            ColumnIndex = 0
+        )
 
     def get_requests(self) -> list[JSON]:
         ret = [self.get_data_request()]
-        for cell in self.cells:
-            ret += cell.get_requests()
+        for col, cell in enumerate(self.cells):
+            ret += cell.at(self.sheet_id, self.row, col).get_requests()
         return ret
     
     def insert_cell(self, cell: Cell, col: int) -> None:
-        cell.sheet_id = self.sheet_id
-        cell.row = self.row
-        cell.column = col
-
-        for cell in self.cells[col:]:
-            cell.column += cell.length
-
-        self.cells.insert(col, cell)
-
+        # A cell's column is its index in cells, so nothing after it needs updating.
         # We need to add blank cells that will be merged with the one we added when we call sheets API
-        for i in range(1, cell.length):
-            self.cells.insert(col + i, Cell('', sheet_id=self.sheet_id, row=self.row, column=col+i))
+        self.cells[col:col] = [cell] + [Cell('') for _ in range(1, cell.length)]
 
     def append_cell(self, cell: Cell) -> None:
         self.insert_cell(cell, len(self.cells))
@@ -287,13 +490,9 @@ class Row:
         self.insert_cell(cell, 0)
 
     def set_row(self, row: int) -> None:
-        for cell in self.cells:
-            cell.row = row
         self.row = row
     
     def set_sheet_id(self, sheet_id: int) -> None:
-        for cell in self.cells:
-            cell.sheet_id = sheet_id
         self.sheet_id = sheet_id
 
     sheet_id: int
@@ -303,39 +502,123 @@ class Row:
 
 class Sheet:
     def __init__(self, sheet_id: int, header: Row, rows: list[Row] = []) -> None:
+        # NOTE: Rows (including the header) can be shared between sheets, the position of a row and
+        # its cells comes from where they are in the sheet and is only worked out when generating requests
         self.sheet_id = sheet_id
         self.header = header
-        
-        self.header.set_sheet_id(sheet_id)
-        self.header.set_row(0)
-        self.rows = []
-        for row in rows:
-            self.append_row(row)
+        self.rows = list(rows)
 
     def get_freeze_request(self) -> JSON:
-        with open(PACKAGE_DIR / 'freeze_row_template.json', 'r', encoding='utf-8') as f:
-            template = string.Template(f.read())
-        return json.loads(template.substitute(
+        return get_template('freeze_row_template.json').render(
             SheetId = self.sheet_id,
             NumFrozenRows = 1
-        ))
+        )
+
+    def get_format_requests(self) -> list[JSON]:
+        """
+        Returns the merge, date/time, checkbox and format requests for every cell that isn't the default
+        format. Neighbouring cells that need the same request share one request covering all of them.
+        """
+        rows = [self.header] + self.rows
+        ret = []
+
+        # Every merged cell is merged on its own, so these can't be combined
+        for row_num, row in enumerate(rows):
+            for col, cell in enumerate(row.cells):
+                if cell.length != 1:
+                    # NOTE: Length < 1 prevented in constructor
+                    ret.append(cell.style.get_merge_request(self.sheet_id, row_num, col))
+
+        styles = [[cell.style for cell in row.cells] for row in rows]
+
+        datetimes = [[style.datetime for style in row] for row in styles]
+        for start_row, end_row, start_col, end_col, pattern in coalesce_ranges(datetimes):
+            style = CellStyle.get(datetime=pattern)
+            ret.append(style.get_datetime_request(self.sheet_id, start_row, end_row, start_col, end_col))
+
+        checkboxes = [[True if style.checkbox else None for style in row] for row in styles]
+        for start_row, end_row, start_col, end_col, _ in coalesce_ranges(checkboxes):
+            ret.append(DEFAULT_STYLE.get_checkbox_request(self.sheet_id, start_row, end_row, start_col, end_col))
+
+        formats = [[None if style is DEFAULT_STYLE else style.format_style for style in row] for row in styles]
+        for start_row, end_row, start_col, end_col, style in coalesce_ranges(formats):
+            ret.append(style.get_format_request(self.sheet_id, start_row, end_row, start_col, end_col))
 
-    def get_requests(self) -> list[JSON]:
-        ret = [self.get_freeze_request()] + self.header.get_requests()
-        for row in self.rows:
-            ret += row.get_requests()
         return ret
-    
-    def insert_row(self, row: Row, row_num: int) -> None:
 
-        row_data = Row(row.cells, self.sheet_id, row_num + 1)  # +1 for header
+    def get_data_request(self) -> JSON:
+        # Every value in the sheet is written by one request
+        return get_template('data_request_template.json').render(
+            Rows = [row.get_row_data() for row in [self.header] + self.rows],
+            SheetId = self.sheet_id,
+            RowIndex = 0,
+            ColumnIndex = 0
+        )
 
-        for row in self.rows[row_num:]:
-            row.row += 1
-            for cell in row.cells:
-                cell.row += 1
-        
-        self.rows.insert(row_num, row_data)
+    def get_layout(self) -> tuple:
+        # Everything the requests for this sheet depend on apart from its ID. Styles are interned, see CellStyle
+        return tuple(tuple((cell.data, cell.style) for cell in row.cells) for row in [self.header] + self.rows)
+
+    def build_requests(self) -> list[JSON]:
+        return [self.get_freeze_request(), self.get_data_request()] + self.get_format_requests()
+
+    def get_requests(self) -> list[JSON]:
+        """
+        Returns the requests that write the whole sheet. Sheets with the same layout (e.g. the sheet
+        every team starts with) only differ in their sheet ID, so their requests are built once and
+        only the sheet ID is filled in.
+        """
+        if not CACHE_LAYOUTS:
+            return self.build_requests()
+
+        layout = self.get_layout()
+        with layout_cache_lock:
+            fragment = layout_cache.get(layout)
+            if fragment is not None:
+                layout_cache.move_to_end(layout)
+        if fragment is None:
+            fragment = RequestFragment(self.build_requests())
+            with layout_cache_lock:
+                layout_cache[layout] = fragment
+                if len(layout_cache) > LAYOUT_CACHE_SIZE:
+                    layout_cache.popitem(last=False)
+        return fragment.render(self.sheet_id)
+
+    def get_diff_requests(self, previous: 'Sheet') -> list[JSON]:
+        """
+        Returns only the requests needed to turn previous (the sheet last written) into this sheet.
+        Cells are compared by position, cells that only exist in one of the sheets are treated as blank.
+        """
+        if previous.sheet_id != self.sheet_id:
+            return self.get_requests()
+
+        rows = [self.header] + self.rows
+        previous_rows = [previous.header] + previous.rows
+
+        undo = []
+        ret = []
+        for row_num in range(max(len(rows), len(previous_rows))):
+            if row_num < len(rows) and row_num < len(previous_rows) and rows[row_num] is previous_rows[row_num]:
+                # A row reused from the previous sheet, e.g. the header
+                continue
+            cells = rows[row_num].cells if row_num < len(rows) else []
+            previous_cells = previous_rows[row_num].cells if row_num < len(previous_rows) else []
+
+            for col in range(max(len(cells), len(previous_cells))):
+                cell = cells[col] if col < len(cells) else BLANK_CELL
+                previous_cell = previous_cells[col] if col < len(previous_cells) else BLANK_CELL
+                if cell.data == previous_cell.data and cell.style is previous_cell.style:
+                    continue
+                cell = cell.at(self.sheet_id, row_num, col)
+                previous_cell = previous_cell.at(self.sheet_id, row_num, col)
+                undo += cell.get_undo_requests(previous_cell)
+                ret += cell.get_diff_requests(previous_cell)
+        # Every old merge and format is undone before anything new is written over it
+        return undo + ret
+    
+    def insert_row(self, row: Row, row_num: int) -> None:
+        # Row numbers come from the position in rows, so nothing after it needs updating
+        self.rows.insert(row_num, row)
     
     def append_row(self, row: Row):
         self.insert_row(row, len(self.rows))
@@ -349,23 +632,53 @@ class Sheet:
 
 
 class GoogleSheets:
-    @staticmethod
-    def __activate_service() -> 'SheetsResource':
-        with open(SERV_ACC_PATH, 'r', encoding='utf-8') as f:
-            GServAcc = json.loads(f.read())
-
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(GServAcc, scopes=SCOPES)
-        return build('sheets', 'v4', credentials=creds)
-
     def __init__(self, spreadsheet_id: str) -> None:
-        self.service = GoogleSheets.__activate_service()
         self.spreadsheet_id = spreadsheet_id
         self.sheets = []
+        self.written_sheets = {}
+        self.metadata = None
+
+    @property
+    def usage(self) -> dict[str, int]:
+        # Calls and bytes for this spreadsheet so far, see usage.USAGE
+        return USAGE.get(self.spreadsheet_id)
+
+    @property
+    def service(self) -> 'SheetsResource':
+        # Shared by all spreadsheets, see client.get_service
+        return get_service()
+
+    def get_sheet_properties(self, refresh: bool = False) -> list[JSON] | None:
+        """
+        Returns the properties (ID, title and grid size) of every sheet in the spreadsheet. They are
+        read once with a field mask and kept until invalidate_metadata is called or refresh is True.
+        Returns None on error.
+        """
+        if self.metadata is None or refresh:
+            try:
+                spreadsheet = execute(self.service.spreadsheets().get(
+                    spreadsheetId=self.spreadsheet_id, fields=METADATA_FIELDS
+                ), 'read', self.spreadsheet_id)
+            except API_ERRORS as e:
+                print(e)
+                return None
+            self.metadata = [sheet.get('properties', {}) for sheet in spreadsheet.get('sheets', [])]
+        return self.metadata
+
+    def invalidate_metadata(self) -> None:
+        # The next get_sheet_properties reads them again
+        self.metadata = None
+
+    @staticmethod
+    def changes_structure(requests: list[JSON]) -> bool:
+        return any(name in request for request in requests for name in STRUCTURAL_REQUESTS)
 
     def get_requests(self) -> list[str]:
         ret = []
         for sheet in self.sheets:
-            ret += sheet.get_requests()
+            previous = self.written_sheets.get(sheet.sheet_id)
+            # Only send what changed since the last successful write, the first write sends everything
+            ret += sheet.get_requests() if previous is None else sheet.get_diff_requests(previous)
         return ret
     
     def get_request_body(self) -> dict[str, typing.Any]:
@@ -376,31 +689,34 @@ class GoogleSheets:
         return body
     
     # NOTE: The following function was generated by ChatGPT
-    def clear_sheets(self) -> None:
+    def clear_sheets(self, sheet_ids: list[int] | None = None) -> bool:
         """
-        Resets all sheets in the spreadsheet:
+        Resets all sheets in the spreadsheet (or only the given sheet IDs):
         - Clears all data
         - Clears all formatting
         - Unmerges merged cells
         - Unfreezes any frozen rows or columns
+
+        Returns whether the sheets were cleared.
         """
 
-        sheets_to_find = [sheet.sheet_id for sheet in self.sheets]
+        sheets_to_find = [sheet.sheet_id for sheet in self.sheets] if sheet_ids is None else sheet_ids
+
+        # Whatever we wrote before is gone, the next write must send the whole sheet again
+        for sheet_id in sheets_to_find:
+            self.written_sheets.pop(sheet_id, None)
 
         # Step 1: Get all sheets
-        try:
-            spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-        except HttpError as e:
-            print(e)
-            return
-        sheets = spreadsheet.get('sheets', [])
-        sheets = [sheet for sheet in sheets if sheet['properties']['sheetId'] in sheets_to_find]
+        properties = self.get_sheet_properties()
+        if properties is None:
+            return False
+        sheets = [sheet for sheet in properties if sheet.get('sheetId') in sheets_to_find]
 
         requests = []
 
         for sheet in sheets:
-            sheet_id = sheet['properties']['sheetId']
-            sheet_name = sheet['properties']['title']
+            sheet_id = sheet['sheetId']
+            sheet_name = sheet['title']
 
             # a) Unmerge all cells
             requests.append({
@@ -440,79 +756,241 @@ class GoogleSheets:
 
             # d) Clear cell values
             try:
-                self.service.spreadsheets().values().clear(
+                execute(self.service.spreadsheets().values().clear(
                     spreadsheetId=self.spreadsheet_id,
                     range=sheet_name
-                ).execute()
-            except HttpError as e:
+                ), 'write', self.spreadsheet_id)
+            except API_ERRORS as e:
                 print(e)
-                return
+                return False
 
         # Step 2: Batch update formatting changes
         if requests:
+            self.invalidate_metadata()
             try:
-                self.service.spreadsheets().batchUpdate(
+                execute(self.service.spreadsheets().batchUpdate(
                     spreadsheetId=self.spreadsheet_id,
                     body={'requests': requests}
-                ).execute()
-            except HttpError as e:
+                ), 'write', self.spreadsheet_id)
+            except API_ERRORS as e:
                 print(e)
-                return
+                return False
+        return True
     
-    def write(self) -> None:
-        self.clear_sheets()
-        # json.dump(self.get_request_body(), open('query.json', 'w'), sort_keys=True, indent='\t', separators=(',', ': '))  # For testing
-        try:
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id, body=self.get_request_body()
-            ).execute()
-        except HttpError as e:
-            print(e)
-            return
+    def write(self) -> bool:
+        """
+        Writes every sheet, failures are printed. Returns whether all of them were written, sheets that
+        weren't are written again by the next write.
+        """
+        # Sheets we have never written need to be cleared first, the rest are diffed against the last write
+        new_sheets = [sheet.sheet_id for sheet in self.sheets if sheet.sheet_id not in self.written_sheets]
+        if new_sheets and not self.clear_sheets(new_sheets):
+            return False
+
+        for sheet in self.sheets:
+            previous = self.written_sheets.get(sheet.sheet_id)
+            requests = sheet.get_requests() if previous is None else sheet.get_diff_requests(previous)
+
+            if GoogleSheets.changes_structure(requests):
+                self.invalidate_metadata()
+
+            # Big sheets are sent in several calls, in order
+            for chunk_num, chunk in enumerate(chunk_requests(requests)):
+                body = {
+                    "requests": chunk,
+                    "includeSpreadsheetInResponse": False
+                }
+                try:
+                    execute(compress(self.service.spreadsheets().batchUpdate(
+                        spreadsheetId=self.spreadsheet_id, body=body
+                    )), 'write', self.spreadsheet_id)
+                except API_ERRORS as e:
+                    print(e)
+                    if chunk_num > 0 or isinstance(e, TRANSPORT_ERRORS):
+                        # Only part of the sheet was written (or the connection failed, so it may have been), so
+                        # it can't be diffed. Clear it and write it all next time
+                        self.written_sheets.pop(sheet.sheet_id, None)
+                    return False
+
+            self.written_sheets[sheet.sheet_id] = sheet
+        return True
     
     def add_sheet(self, sheet: Sheet) -> None:
+        # A sheet with the same ID replaces the old one, so repeated writes don't resend old sheets
+        self.sheets = [old for old in self.sheets if old.sheet_id != sheet.sheet_id]
         self.sheets.append(sheet)
 
+    def mark_written(self) -> None:
+        """
+        Records the current sheets as already written, without writing them. For example when resuming
+        a game, so the next write only sends what changed instead of clearing and rewriting everything.
+        """
+        for sheet in self.sheets:
+            self.written_sheets[sheet.sheet_id] = sheet
+
     def read_list(self, sheet: str, column: str) -> list[str]:
         range_name = f'{sheet}!{column}2:{column}'
 
         try:
-            result = self.service.spreadsheets().values().get(spreadsheetId=self.spreadsheet_id,
-                                                            range=range_name).execute()
-        except HttpError as e:
+            result = execute(self.service.spreadsheets().values().get(spreadsheetId=self.spreadsheet_id,
+                                                                    range=range_name), 'read', self.spreadsheet_id)
+        except API_ERRORS as e:
             print(e)
             return
 
         rows: list[list[str]] = result.get('values', [])
         return [val[0] for val in rows]
 
+    @staticmethod
+    def get_column_ranges(sheet: str, columns: list[str]) -> list[str]:
+        return [f'{sheet}!{column}2:{column}' for column in columns]
+
+    @staticmethod
+    def parse_columns(result: JSON) -> list[list[str]]:
+        # Columns are requested in COLUMNS major dimension, so blank cells in the middle come back as ''
+        return [
+            value_range.get('values', [[]])[0]
+            for value_range in result.get('valueRanges', [])
+        ]
+
+    def get_read_columns_request(self, sheet: str, columns: list[str]) -> 'HttpRequest':
+        return self.get_read_column_ranges_request(GoogleSheets.get_column_ranges(sheet, columns))
+
+    def get_read_column_ranges_request(self, ranges: list[str]) -> 'HttpRequest':
+        return self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=ranges,
+            majorDimension='COLUMNS'
+        )
+
+    def read_column_ranges(self, ranges: list[str]) -> list[list[str]]:
+        """
+        Reads single column ranges in A1 notation (e.g. 'Curses!A2:A'), which can be from different
+        sheets, in a single values.batchGet call.
+
+        Returns:
+            list[list[str]]: The values of each range, in the same order, or None on error.
+        """
+        try:
+            result = execute(self.get_read_column_ranges_request(ranges), 'read', self.spreadsheet_id)
+        except API_ERRORS as e:
+            print(e)
+            return
+
+        return GoogleSheets.parse_columns(result)
+
+    def read_columns(self, sheet: str, columns: list[str]) -> list[list[str]]:
+        """
+        Reads several columns (from row 2 down) of a sheet in a single values.batchGet call.
+
+        Args:
+            sheet (str): The name of the sheet to read from.
+            columns (list[str]): The column letters to read, e.g. ['A', 'B'].
+
+        Returns:
+            list[list[str]]: One list per requested column, in the same order, or None on error.
+        """
+        return self.read_column_ranges(GoogleSheets.get_column_ranges(sheet, columns))
+
+    @staticmethod
+    def read_columns_many(
+        reads: list[tuple['GoogleSheets', str, list[str]]]
+    ) -> list[list[list[str]] | None]:
+        """
+        Reads columns from many spreadsheets using as few HTTP calls as possible. Each spreadsheet
+        needs its own values.batchGet, but these are sent together in batch HTTP requests.
+
+        Args:
+            reads: (spreadsheet, sheet name, columns) for each read to make.
+
+        Returns:
+            The result of read_columns for each read, in the same order. None for reads that failed.
+        """
+        responses = execute_batch([
+            spreadsheet.get_read_columns_request(sheet, columns)
+            for spreadsheet, sheet, columns in reads
+        ], 'read', [spreadsheet.spreadsheet_id for spreadsheet, _, _ in reads])
+        return GoogleSheets.__parse_batch(responses, GoogleSheets.parse_columns)
+
+    @staticmethod
+    def __parse_batch(
+        responses: list[tuple[JSON, Exception | None]],
+        parse: typing.Callable[[JSON], list[list[str]]]
+    ) -> list[list[list[str]] | None]:
+        results: list[list[list[str]] | None] = []
+        for response, exception in responses:
+            if exception is not None:
+                print(exception)
+                results.append(None)
+            else:
+                results.append(parse(response))
+        return results
+
+    @staticmethod
+    def parse_range(result: JSON) -> list[list[str]]:
+        return result.get('values', [])
+
+    def get_read_range_request(self, range_name: str) -> 'HttpRequest':
+        return self.service.spreadsheets().values().get(spreadsheetId=self.spreadsheet_id, range=range_name)
+
+    def read_range(self, range_name: str) -> list[list[str]]:
+        """
+        Reads a range in A1 notation (e.g. 'Game!F1:G1') in a single values.get call.
+
+        Returns:
+            list[list[str]]: The values of each row in the range (trailing blanks are left out), or None on error.
+        """
+        try:
+            result = execute(self.get_read_range_request(range_name), 'read', self.spreadsheet_id)
+        except API_ERRORS as e:
+            print(e)
+            return
+
+        return GoogleSheets.parse_range(result)
+
+    @staticmethod
+    def read_range_many(reads: list[tuple['GoogleSheets', str]]) -> list[list[list[str]] | None]:
+        """
+        Like read_columns_many, but for read_range.
+
+        Args:
+            reads: (spreadsheet, range) for each read to make.
+        """
+        responses = execute_batch([
+            spreadsheet.get_read_range_request(range_name)
+            for spreadsheet, range_name in reads
+        ], 'read', [spreadsheet.spreadsheet_id for spreadsheet, _ in reads])
+        return GoogleSheets.__parse_batch(responses, GoogleSheets.parse_range)
+
     # Generated by ChatGPT, minor adaptations made by me
     def get_sheet_id_by_name(self, sheet_name: str) -> int:
         """
         Returns the sheet ID for the sheet with the given name.
+        Served from the cached sheet properties, which are read again once if the name isn't there.
         
         Args:
             sheet_name (str): The name of the sheet to look for.
 
         Returns:
-            int: The sheet ID if found, or None if not found.
+            int: The sheet ID if found, or None if the spreadsheet can't be read.
         """
-        try:
-            spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-        except HttpError as e:
-            print(e)
-            return
-
-        for sheet in spreadsheet.get('sheets', []):
-            properties = sheet.get('properties', {})
-            if properties.get('title') == sheet_name:
-                return properties.get('sheetId')
+        # If the properties are read now, reading them again won't find anything new
+        was_cached = self.metadata is not None
+        for refresh in (False, True) if was_cached else (False,):
+            sheets = self.get_sheet_properties(refresh)
+            if sheets is None:
+                return
+            for properties in sheets:
+                if properties.get('title') == sheet_name:
+                    return properties.get('sheetId')
         
         raise RuntimeError(f'Unable to find sheet "{sheet_name}" in spreadsheet')
 
-    service: 'SheetsResource'
     spreadsheet_id: str
     sheets: list[Sheet]
+    written_sheets: dict[int, Sheet]
+    # Properties of every sheet in the spreadsheet (see METADATA_FIELDS), None until read
+    metadata: list[JSON] | None
 
 
 
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+import typing
+
+# Sheets API quotas per minute, per user (the service account) per project. These are Google's defaults
+# https://developers.google.com/workspace/sheets/api/limits
+READ_QUOTA_PER_MINUTE = 60
+WRITE_QUOTA_PER_MINUTE = 60
+
+# How many calls can be made back to back before pacing kicks in
+BURST = 10
+
+# Retry settings for calls rejected with one of RETRY_STATUSES
+RETRY_STATUSES = (429, 500, 503)
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0  # Seconds
+BACKOFF_MAX = 64.0  # Seconds
+
+# Don't use the global generator for jitter, it is used for the board and curses
+jitter_random = random.Random()
+
+
+class TokenBucket:
+    """
+    Paces calls so that no more than quota_per_minute are made in any 60 second window.
+
+    The bucket holds up to `burst` tokens and refills at (quota - burst) per minute, which keeps any
+    60 second window within the quota. When Google still rejects a call for exceeding the quota,
+    throttle() halves the refill rate, it then recovers a little with every call that gets through.
+    Thread safe, callers waiting for tokens are served in the order they called acquire.
+    """
+
+    def __init__(self, quota_per_minute: int, burst: int = BURST) -> None:
+        burst = min(burst, quota_per_minute // 2)
+        self.quota_per_minute = quota_per_minute
+        self.max_rate = (quota_per_minute - burst) / 60
+        self.rate = self.max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Blocks until the given number of calls may be made. Returns the number of seconds waited.
+        """
+        with self.lock:
+            self.__refill(time.monotonic())
+            # Reserve the tokens now (possibly going negative) so later callers queue behind us
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttle(self) -> None:
+        # Google says we are over quota, empty the bucket and slow down
+        with self.lock:
+            self.__refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+            self.rate = max(self.max_rate / 10, self.rate / 2)
+
+    def recover(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def seconds_per_call(self) -> float:
+        return 1 / self.rate
+
+    quota_per_minute: int
+    max_rate: float
+    rate: float
+    burst: int
+    tokens: float
+    updated: float
+    lock: threading.Lock
+
+
+type CallKind = typing.Literal['read', 'write']
+
+LIMITERS: dict[CallKind, TokenBucket] = {
+    'read': TokenBucket(READ_QUOTA_PER_MINUTE),
+    'write': TokenBucket(WRITE_QUOTA_PER_MINUTE)
+}
+
+
+def set_quotas(read_quota_per_minute: int, write_quota_per_minute: int) -> None:
+    """
+    Replaces the limiters, e.g. if the project has a higher quota or when running against the emulator.
+    """
+    LIMITERS['read'] = TokenBucket(read_quota_per_minute)
+    LIMITERS['write'] = TokenBucket(write_quota_per_minute)
+
+
+def min_interval(reads: int, writes: int) -> float:
+    """
+    Returns the fewest seconds between repeats of something that makes the given number of read and
+    write calls, such that it can repeat forever without being slowed down by the limiters.
+    """
+    return max(reads / LIMITERS['read'].max_rate, writes / LIMITERS['write'].max_rate)
+
+
+def backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return jitter_random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
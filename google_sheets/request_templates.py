@@ -0,0 +1,151 @@
+import json
+import re
+import string
+import typing
+from functools import cache
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).parent
+
+# Set to False to fall back to reading and substituting the template file on every request,
+# this is how requests used to be built and is kept around for benchmarking
+COMPILE_TEMPLATES = True
+
+type JSON = typing.Any
+
+# Matches "$Name" (placeholder inside a JSON string) or a bare $Name (placeholder for a JSON value)
+PLACEHOLDER_REGEX = re.compile(r'"\$(\w+)"|\$(\w+)')
+
+
+class Placeholder:
+    def __init__(self, name: str, quoted: bool) -> None:
+        self.name = name
+        self.quoted = quoted
+
+    def resolve(self, values: dict[str, typing.Any]) -> JSON:
+        value = values[self.name]
+        if not self.quoted:
+            return value
+
+        # Quoted placeholders used to be substituted into the JSON text, so any escapes in the
+        # value were decoded by the JSON parser. Keep that behaviour, but only pay for it if needed
+        value = str(value)
+        if '\\' in value or '"' in value:
+            return json.loads(f'"{value}"')
+        return value
+
+    name: str
+    quoted: bool
+
+
+class RequestTemplate:
+    """
+    A request template JSON file from the package directory, loaded and parsed once.
+
+    Placeholders are written as $Name. A placeholder in quotes ("$Name") is always filled as a
+    string, a bare placeholder is filled with the given Python value (int, float, bool, ...).
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.path = PACKAGE_DIR / filename
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.text = f.read()
+
+        placeholders: dict[str, Placeholder] = {}
+
+        def mark(match: re.Match) -> str:
+            quoted = match.group(1) is not None
+            name = match.group(1) if quoted else match.group(2)
+            marker = f'\0{"s" if quoted else "v"}{name}'
+            placeholders[marker] = Placeholder(name, quoted)
+            return json.dumps(marker)
+
+        tree = json.loads(PLACEHOLDER_REGEX.sub(mark, self.text))
+        self.tree = RequestTemplate.__compile(tree, placeholders)
+
+    @staticmethod
+    def __compile(node: JSON, placeholders: dict[str, 'Placeholder']) -> JSON:
+        if isinstance(node, dict):
+            return {key: RequestTemplate.__compile(value, placeholders) for key, value in node.items()}
+        if isinstance(node, list):
+            return [RequestTemplate.__compile(value, placeholders) for value in node]
+        if isinstance(node, str) and node in placeholders:
+            return placeholders[node]
+        return node
+
+    @staticmethod
+    def __fill(node: JSON, values: dict[str, typing.Any]) -> JSON:
+        if isinstance(node, dict):
+            return {key: RequestTemplate.__fill(value, values) for key, value in node.items()}
+        if isinstance(node, list):
+            return [RequestTemplate.__fill(value, values) for value in node]
+        if isinstance(node, Placeholder):
+            return node.resolve(values)
+        return node
+
+    def render_uncompiled(self, **values: typing.Any) -> JSON:
+        # The original way of building a request: read the file, substitute text, parse the JSON
+        with open(self.path, 'r', encoding='utf-8') as f:
+            template = string.Template(f.read())
+        return json.loads(template.substitute({
+            name: value if isinstance(value, str) else json.dumps(value)
+            for name, value in values.items()
+        }))
+
+    def render(self, **values: typing.Any) -> JSON:
+        if not COMPILE_TEMPLATES:
+            return self.render_uncompiled(**values)
+        return RequestTemplate.__fill(self.tree, values)
+
+    path: Path
+    text: str
+    tree: JSON
+
+
+def replace_at(node: JSON, path: tuple[str | int, ...], value: JSON) -> JSON:
+    # A copy of node with value at path (keys and list indices). Only the containers on the path are copied
+    copy = dict(node) if isinstance(node, dict) else list(node)
+    copy[path[0]] = value if len(path) == 1 else replace_at(node[path[0]], path[1:], value)
+    return copy
+
+
+class RequestFragment:
+    """
+    Requests that are built once and reused for any sheet, e.g. everything needed to write a sheet
+    that every team starts with. Rendering only replaces every "sheetId" in them, the rest of the
+    requests is shared between renders, so requests must not be modified.
+    """
+
+    def __init__(self, requests: list[JSON]) -> None:
+        self.requests = requests
+        self.sheet_ids = []
+        for i, request in enumerate(requests):
+            RequestFragment.__find_sheet_ids(request, (i,), self.sheet_ids)
+
+    @staticmethod
+    def __find_sheet_ids(node: JSON, path: tuple[str | int, ...], found: list[tuple[tuple[str | int, ...], Placeholder]]) -> None:
+        items = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else []
+        for key, value in items:
+            if key == 'sheetId':
+                # Templates write the ID as a string, keep whatever type it had
+                found.append((path + (key,), Placeholder('SheetId', isinstance(value, str))))
+            else:
+                RequestFragment.__find_sheet_ids(value, path + (key,), found)
+
+    def render(self, sheet_id: int) -> list[JSON]:
+        ret = list(self.requests)
+        for path, placeholder in self.sheet_ids:
+            ret[path[0]] = replace_at(ret[path[0]], path[1:], placeholder.resolve({'SheetId': sheet_id}))
+        return ret
+
+    requests: list[JSON]
+    # Where each sheetId is: the request's index followed by the keys leading to it
+    sheet_ids: list[tuple[tuple[str | int, ...], Placeholder]]
+
+
+@cache
+def get_template(filename: str) -> RequestTemplate:
+    """
+    Returns the compiled template for the given file, each template is only loaded once per process.
+    """
+    return RequestTemplate(filename)
@@ -0,0 +1,144 @@
+import collections
+import json
+import os
+import threading
+import time
+import typing
+from pathlib import Path
+
+from .rate_limiter import LIMITERS, CallKind
+
+type JSON = typing.Any
+
+# Calls are counted over the same sliding window Google measures quotas over
+WINDOW_SECONDS = 60
+
+COUNTERS = ('read_calls', 'write_calls', 'bytes_sent', 'bytes_received')
+
+
+class UsageStats:
+    """
+    Counts the Sheets API calls made (and bytes sent and received) per spreadsheet, in total and over
+    the last minute. Every call made by client.execute and client.execute_batch is recorded in USAGE.
+    Thread safe.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.totals = collections.defaultdict(collections.Counter)
+        self.recent = collections.deque()
+        self.started = time.time()
+
+    def __expire(self, now: float) -> None:
+        while self.recent and self.recent[0][0] <= now - WINDOW_SECONDS:
+            self.recent.popleft()
+
+    def record(self, spreadsheet_id: str, kind: CallKind, calls: int = 1, bytes_sent: int = 0, bytes_received: int = 0) -> None:
+        now = time.monotonic()
+        with self.lock:
+            totals = self.totals[spreadsheet_id]
+            totals[f'{kind}_calls'] += calls
+            totals['bytes_sent'] += bytes_sent
+            totals['bytes_received'] += bytes_received
+            self.recent.append((now, spreadsheet_id, kind, calls))
+            self.__expire(now)
+
+    def get(self, spreadsheet_id: str) -> dict[str, int]:
+        # Totals for one spreadsheet
+        with self.lock:
+            totals = self.totals.get(spreadsheet_id, collections.Counter())
+            return {name: totals[name] for name in COUNTERS}
+
+    def calls_last_minute(self, kind: CallKind, spreadsheet_id: str | None = None) -> int:
+        with self.lock:
+            self.__expire(time.monotonic())
+            return sum(
+                calls for _, recent_id, recent_kind, calls in self.recent
+                if recent_kind == kind and spreadsheet_id in (None, recent_id)
+            )
+
+    def snapshot(self) -> JSON:
+        """
+        Returns every counter as JSON, along with the quotas and how much of them the last minute used.
+        """
+        with self.lock:
+            self.__expire(time.monotonic())
+            last_minute = collections.defaultdict(collections.Counter)
+            for _, spreadsheet_id, kind, calls in self.recent:
+                last_minute[spreadsheet_id][kind] += calls
+            spreadsheets = {
+                spreadsheet_id: {
+                    **{name: totals[name] for name in COUNTERS},
+                    'read_calls_last_minute': last_minute[spreadsheet_id]['read'],
+                    'write_calls_last_minute': last_minute[spreadsheet_id]['write']
+                }
+                for spreadsheet_id, totals in self.totals.items()
+            }
+
+        ret = {'time': time.time(), 'started': self.started, 'spreadsheets': spreadsheets}
+        for kind in LIMITERS:
+            calls = sum(usage[f'{kind}_calls_last_minute'] for usage in spreadsheets.values())
+            quota = LIMITERS[kind].quota_per_minute
+            ret[kind] = {'calls_last_minute': calls, 'quota_per_minute': quota, 'quota_used': calls / quota}
+        return ret
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the counters in the Prometheus text format, e.g. for the node exporter's textfile collector.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f'# HELP sheets_{name} {help_text}')
+            lines.append(f'# TYPE sheets_{name} {kind}')
+            lines.extend(f'sheets_{name}{labels} {value}' for labels, value in samples)
+
+        spreadsheets = snapshot['spreadsheets']
+        for name in COUNTERS:
+            metric(f'{name}_total', 'counter', f'Sheets API {name.replace("_", " ")} since the game started', [
+                (f'{{spreadsheet_id="{spreadsheet_id}"}}', usage[name]) for spreadsheet_id, usage in spreadsheets.items()
+            ])
+        for kind in LIMITERS:
+            metric(f'{kind}_calls_last_minute', 'gauge', f'Sheets API {kind} calls in the last {WINDOW_SECONDS} seconds', [
+                (f'{{spreadsheet_id="{spreadsheet_id}"}}', usage[f'{kind}_calls_last_minute'])
+                for spreadsheet_id, usage in spreadsheets.items()
+            ])
+            metric(f'{kind}_quota_per_minute', 'gauge', f'Sheets API {kind} calls allowed per minute', [
+                ('', snapshot[kind]['quota_per_minute'])
+            ])
+            metric(f'{kind}_quota_used_ratio', 'gauge', f'Fraction of the {kind} quota used in the last minute', [
+                ('', snapshot[kind]['quota_used'])
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str | Path) -> None:
+        """
+        Writes the counters to path, as JSON if it ends in .json and in the Prometheus text format otherwise.
+        The file is replaced in one step, so readers never see half of it.
+        """
+        path = Path(path)
+        if path.suffix == '.json':
+            text = json.dumps(self.snapshot(), indent=4)
+        else:
+            text = self.to_prometheus()
+
+        temp_path = path.with_name(f'.{path.name}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.totals.clear()
+            self.recent.clear()
+            self.started = time.time()
+
+    lock: threading.Lock
+    totals: collections.defaultdict[str, collections.Counter[str]]
+    # (time.monotonic(), spreadsheet ID, kind, calls) for each call in the last WINDOW_SECONDS
+    recent: collections.deque[tuple[float, str, CallKind, int]]
+    started: float
+
+
+USAGE = UsageStats()
@@ -1,9 +1,16 @@
+import bingosync
+import board
 import google_sheets
+import master_data
+import orchestrator
+from google_sheets import rate_limiter, usage
 import random
-import pyautogui
 import time
-import pyperclip
 import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 
 from typing import Any, List, Literal
 
@@ -11,6 +18,9 @@ type JSON = Any
 
 ROOM_PASSWORD = 'uwece2027'
 
+# Bump when the snapshot format changes, older snapshots can't be resumed
+SNAPSHOT_VERSION = 3
+
 
 # Generated by ChatGPT
 def pad_lists_in_place(*lists: List[Any], fill_value: Any = None) -> None:
@@ -27,15 +37,18 @@ def pad_lists_in_place(*lists: List[Any], fill_value: Any = None) -> None:
         lst += [fill_value] * (max_length - len(lst))
 
 
-def spreadsheet_list_logical_or(list_a: list[str], list_b: list[str]) -> list[str]:
-    # Trust me, this is necessary to avoid a bunch of extra FALSE being put below
-    if len(list_a) > len(list_b):
-        pad_lists_in_place(list_a, list_b)
+def get_checked_mask(column: list[str]) -> int:
+    # Bitset of the ticked boxes in column, bit i is row i
+    return int(''.join('1' if cell == 'TRUE' else '0' for cell in reversed(column)) or '0', 2)
 
-    return [
-        'TRUE' if a == 'TRUE' or b == 'TRUE' else 'FALSE'
-        for a, b in zip(list_a, list_b)
-    ]
+
+def get_checkbox_column(mask: int, length: int) -> list[str]:
+    """
+    The inverse of get_checked_mask: 'TRUE' for every row in mask, 'FALSE' for the rest of the first
+    length rows. Never shorter than the last row in mask.
+    """
+    bits = f'{mask:b}'[::-1] if mask else ''
+    return ['TRUE' if bit == '1' else 'FALSE' for bit in bits.ljust(length, '0')]
 
 
 class Team:
@@ -44,73 +57,85 @@ class Team:
         google_sheets.Cell('Power-up Objectives', bold=True),
         google_sheets.Cell(''),
         google_sheets.Cell('Used', bold=True),
-        google_sheets.Cell('Curse', bold=True)
+        google_sheets.Cell('Curse', bold=True),
+        # Change probe, hidden by the white text. See Team.probe_changed
+        google_sheets.Cell('=IFERROR(TEXTJOIN(",",TRUE,FILTER(ROW(A2:A),A2:A=TRUE)),"")', text_colour='White'),
+        google_sheets.Cell('=IFERROR(TEXTJOIN(",",TRUE,FILTER(ROW(D2:D),D2:D=TRUE)),"")', text_colour='White')
     ])
 
+    # Completed, power-ups, used and curses
+    READ_COLUMNS = ['A', 'B', 'D', 'E']
+    PROBE_RANGE = 'Game!F1:G1'
+
     def __init__(
         self,
         spreadsheet_id: str,
         power_ups: list[str],
-        curses: list[str]
+        curses: list[str],
+        seed: int | None = None,
+        state: JSON | None = None
     ) -> None:
+        """
+        Args:
+            state: A state from get_state to resume from. The spreadsheet is left as it is instead of
+                being cleared and rewritten.
+        """
         self.sheet = google_sheets.GoogleSheets(spreadsheet_id)
-        self.sheet_id = self.sheet.get_sheet_id_by_name('Game')
         self.power_ups = power_ups
         self.curses = curses
+        # Each team draws curses from its own generator, so teams can be updated in any order
+        self.rng = random.Random(seed)
+        self.probe = None
+
+        if state is not None:
+            self.set_state(state)
+            return
 
+        self.sheet_id = self.sheet.get_sheet_id_by_name('Game')
         self.completed_power_ups = 0
         self.used_curses = 0
-        self.completed_power_ups_list = []
-        self.used_curses_list = []
+        self.written_columns = None
+        self.rows = []
 
-        sheet = google_sheets.Sheet(self.sheet_id, self.HEADER)
+        self.sheet.add_sheet(self.get_initial_sheet())
+        self.sheet.write()
 
-        for power_up in self.power_ups:
-            sheet.append_row(google_sheets.Row([
+    @staticmethod
+    @cache
+    def get_initial_rows(power_ups: tuple[str, ...]) -> tuple[google_sheets.Row, ...]:
+        # The same for every team in a game, so built once and shared. Rows are never modified once in a sheet
+        return tuple(
+            google_sheets.Row([
                 google_sheets.Cell('FALSE', checkbox=True),
                 google_sheets.Cell(power_up)
-            ]))
-        
-        self.sheet.add_sheet(sheet)
-        self.sheet.clear_sheets()
-        self.sheet.write()
-
-    def update(self) -> None:
-        # Check completed power-ups
-        completed = self.sheet.read_list('Game', 'A')
-        power_ups = self.sheet.read_list('Game', 'B')
-
-        completed = spreadsheet_list_logical_or(completed, self.completed_power_ups_list)
+            ])
+            for power_up in power_ups
+        )
 
-        current_completed = len([cell for cell in completed if cell == 'TRUE'])
-        new_curses = current_completed - self.completed_power_ups
-
-        # Check completed curses
-        curses_used = self.sheet.read_list('Game', 'D')
-        curses = self.sheet.read_list('Game', 'E')
-
-        curses_used = spreadsheet_list_logical_or(curses_used, self.used_curses_list)
-
-        current_curses = len([cell for cell in curses_used if cell == 'TRUE'])
-
-        if current_curses == self.used_curses and current_completed == self.completed_power_ups:
-            return
-    
-        self.completed_power_ups = current_completed
-        self.used_curses = current_curses
-        self.completed_power_ups_list = completed
-        self.used_curses_list = curses_used
-
-        for i in range(new_curses):
-            curses.append(random.choice(self.curses))
-            curses_used.append('FALSE')
+    def get_initial_sheet(self) -> google_sheets.Sheet:
+        return google_sheets.Sheet(self.sheet_id, self.HEADER, Team.get_initial_rows(tuple(self.power_ups)))
 
+    def get_sheet(
+        self,
+        completed: list[str],
+        power_ups: list[str],
+        curses_used: list[str],
+        curses: list[str],
+        changed_rows: int = -1
+    ) -> google_sheets.Sheet:
+        """
+        Args:
+            changed_rows: Bitset of the rows whose boxes changed since the sheet was last built. Other
+                rows are reused from then if their text is the same, so diffing against them is free.
+        """
         sheet = google_sheets.Sheet(self.sheet_id, header=self.HEADER)
+        previous = list(zip(*self.written_columns)) if self.written_columns is not None else []
 
-        # Need to extend all lists to be length of maximum
-        pad_lists_in_place(completed, power_ups, curses_used, curses, fill_value='')
-
-        for complete, power_up, curse_used, curse in zip(completed, power_ups, curses_used, curses, strict=True):
+        for i, values in enumerate(zip(completed, power_ups, curses_used, curses, strict=True)):
+            if not changed_rows >> i & 1 and i < len(self.rows) and previous[i] == values:
+                sheet.append_row(self.rows[i])
+                continue
+            complete, power_up, curse_used, curse = values
             sheet.append_row(google_sheets.Row([
                 google_sheets.Cell(complete, checkbox=True if power_up != '' else False),
                 google_sheets.Cell(power_up, strikethrough=complete == 'TRUE'),
@@ -118,95 +143,319 @@ class Team:
                 google_sheets.Cell(curse_used, checkbox=True if curse != '' else False),
                 google_sheets.Cell(curse, strikethrough=curse_used == 'TRUE')
             ]))
+        self.rows = sheet.rows
+        return sheet
+
+    def get_state(self) -> JSON:
+        version, internal_state, gauss_next = self.rng.getstate()
+        return {
+            'spreadsheet_id': self.sheet.spreadsheet_id,
+            'sheet_id': self.sheet_id,
+            'completed_power_ups': self.completed_power_ups,
+            'used_curses': self.used_curses,
+            'written_columns': self.written_columns,
+            'rng': [version, list(internal_state), gauss_next]
+        }
+
+    def set_state(self, state: JSON) -> None:
+        self.sheet_id = state['sheet_id']
+        self.completed_power_ups = state['completed_power_ups']
+        self.used_curses = state['used_curses']
+        self.written_columns = None
+        self.rows = []
+        version, internal_state, gauss_next = state['rng']
+        self.rng.setstate((version, tuple(internal_state), gauss_next))
+
+        # What was last written is already in the spreadsheet, later writes only send changes to it
+        if state['written_columns'] is None:
+            self.sheet.add_sheet(self.get_initial_sheet())
+        else:
+            self.sheet.add_sheet(self.get_sheet(*state['written_columns']))
+            self.written_columns = state['written_columns']
+        self.sheet.mark_written()
+
+    def probe_changed(self, probe: list[list[str]] | None) -> bool:
+        """
+        The probe cells list the rows of the ticked boxes in the completed and used columns. Which boxes
+        are ticked is all update acts on, so if the probe is the same as last time there is no need to
+        read the columns. A count isn't enough: unticking one box and ticking another keeps the count.
+        Returns True (and remembers the probe) if the columns need to be read.
+        """
+        if probe is None:
+            # The probe could not be read, fall back to reading the columns
+            return True
+        if probe == self.probe:
+            return False
+        self.probe = probe
+        return True
+
+    def read(self) -> list[list[str]] | None:
+        return self.sheet.read_columns('Game', self.READ_COLUMNS)
+
+    def update(self, columns: list[list[str]] | None = None) -> bool:
+        """
+        Args:
+            columns: The READ_COLUMNS of the Game sheet if they have already been read (see Game.process).
+
+        Returns:
+            bool: Whether the team's state changed. It doesn't if the sheet couldn't be written.
+        """
+        if columns is None:
+            columns = self.read()
+        if columns is None:
+            return False
+
+        completed, power_ups, curses_used, curses = columns
+
+        # Boxes stay ticked once ticked, so merging with what the sheet says is an OR
+        completed_power_ups = get_checked_mask(completed) | self.completed_power_ups
+        used_curses = get_checked_mask(curses_used) | self.used_curses
+        new_completed = completed_power_ups ^ self.completed_power_ups
+        new_used = used_curses ^ self.used_curses
+        if not new_completed and not new_used:
+            return False
+
+        previous = (self.completed_power_ups, self.used_curses, self.rng.getstate(), self.rows)
+        self.completed_power_ups = completed_power_ups
+        self.used_curses = used_curses
+        completed = get_checkbox_column(completed_power_ups, len(completed))
+        curses_used = get_checkbox_column(used_curses, len(curses_used))
+
+        # Every newly completed power-up gives a curse, in a new row at the bottom
+        changed_rows = new_completed | new_used
+        for i in range(new_completed.bit_count()):
+            changed_rows |= 1 << len(curses)
+            curses.append(self.rng.choice(self.curses))
+            curses_used.append('FALSE')
 
-        self.sheet.add_sheet(sheet)
-        self.sheet.clear_sheets()
-        self.sheet.write()
+        # Need to extend all lists to be length of maximum
+        pad_lists_in_place(completed, power_ups, curses_used, curses, fill_value='')
+
+        self.sheet.add_sheet(self.get_sheet(completed, power_ups, curses_used, curses, changed_rows))
+        if not self.sheet.write():
+            # Go back to the state the spreadsheet has, so the next tick reads the same changes and tries again
+            self.completed_power_ups, self.used_curses, rng_state, self.rows = previous
+            self.rng.setstate(rng_state)
+            self.probe = None
+            return False
+
+        self.written_columns = [completed, power_ups, curses_used, curses]
+        return True
 
     sheet: google_sheets.GoogleSheets
     sheet_id: int
     power_ups: list[str]
     curses: list[str]
+    rng: random.Random
 
+    # Bitsets of the rows with a completed power-up and a used curse, bit i is the row below the header
     completed_power_ups: int
     used_curses: int
-    completed_power_ups_list: list[str]
-    used_curses_list: list[str]
+    # The columns of the sheet last written by update, None if update hasn't written anything
+    written_columns: list[list[str]] | None
+    # The rows of the sheet last built by get_sheet
+    rows: list[google_sheets.Row]
+    probe: list[list[str]] | None
 
 
 class Game:
     SPREADSHEET_ID = '18c59U0jZu4K_6cWjtoOvsipxxACwQNWtxkHN_I6ORZ4'
 
-    def __init__(self, team_sheets: list[str]) -> None:
-        self.sheet = google_sheets.GoogleSheets(self.SPREADSHEET_ID)
-        self.objectives = self.sheet.read_list('Objectives', 'A')
-        self.wild_cards = self.sheet.read_list('Wild Cards', 'A')
-        self.power_ups = self.sheet.read_list('Power-ups', 'A')
-        self.curses = self.sheet.read_list('Curses', 'A')
+    def __init__(
+        self,
+        team_sheets: list[str],
+        workers: int = 1,
+        snapshot_path: str | None = None,
+        resume: bool = False,
+        master_cache: master_data.MasterDataCache | None = None,
+        refresh_master: bool = False,
+        master_spreadsheet_id: str | None = None
+    ) -> None:
+        """
+        Args:
+            team_sheets: The spreadsheet ID of each team's game spreadsheet.
+            workers: How many teams are provisioned and updated at the same time.
+            snapshot_path: File the game state is saved to whenever it changes, None to not save it.
+            resume: Continue the game saved in snapshot_path (team_sheets is ignored). Nothing is read
+                from the master spreadsheet and the team spreadsheets are not cleared.
+            master_cache: Where to cache the lists from the master spreadsheet, None to always read them.
+            refresh_master: Read the master spreadsheet even if master_cache has recent lists.
+            master_spreadsheet_id: Spreadsheet the lists are read from, SPREADSHEET_ID by default.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.sheet = google_sheets.GoogleSheets(master_spreadsheet_id or self.SPREADSHEET_ID)
+        self.snapshot_path = snapshot_path
         self.board = []
+        self.team_times = []
 
-        self.teams = [
-            Team(team_sheet, self.power_ups, self.curses)
-            for team_sheet in team_sheets
-        ]
-
-    def generate_board(self) -> None:
-        # Each board contains 25 cells
-        # 24 of those cells are from objectives and the last is a wild card
-        # Of the 24 normal objectives, a single one is chosen as the 8-ball
-
-        objectives = self.objectives
-        while len(self.board) < 24:
-            # Choose random objective
-            rand = random.randint(0, len(objectives) - 1)
-            self.board.append(objectives[rand])
-        
-        # Choose one 8-ball
-        rand = random.randint(0, 23)
-        self.board[rand] = f'[8-Ball] {self.board[rand]}'
+        if resume:
+            self.load_snapshot()
+            return
 
-        # Choose 1 wild card
-        rand = random.randint(0, len(self.wild_cards) - 1)
-        self.board.append(f'[WC] {self.wild_cards[rand]}')
+        if master_cache is None:
+            data = master_data.read_master_data(self.sheet)
+        else:
+            data = master_cache.load(self.sheet, refresh_master)
+        if data is None:
+            raise RuntimeError('Unable to read the master spreadsheet')
+
+        # Objectives can have a difficulty in column B and a category in column C
+        self.objectives, self.difficulties, self.categories = Game.parse_objectives(
+            [data['objectives'], data['difficulties'], data['categories']]
+        )
+        self.wild_cards = data['wild_cards']
+        self.power_ups = data['power_ups']
+        self.curses = data['curses']
+
+        # Seeds are drawn here, in order, so curses only depend on the global seed and not on scheduling
+        seeds = [random.getrandbits(64) for _ in team_sheets]
+        self.teams = list(self.executor.map(
+            lambda team_sheet, seed: Team(team_sheet, self.power_ups, self.curses, seed),
+            team_sheets, seeds
+        ))
+
+    @staticmethod
+    def plan_interval(num_teams: int, changed_teams: int | None = None) -> float:
+        """
+        Returns the fewest seconds between calls to process that the Sheets API quotas allow indefinitely.
+
+        Args:
+            num_teams: Number of teams in the game.
+            changed_teams: Number of teams whose sheet changes every tick, all of them (the worst case) by default.
+        """
+        changed_teams = num_teams if changed_teams is None else changed_teams
+        # Every tick reads each team's probe, then reads the columns of and writes to each team that changed
+        return rate_limiter.min_interval(num_teams + changed_teams, changed_teams)
+
+    @staticmethod
+    def parse_objectives(columns: list[list[str]] | None) -> tuple[list[str], list[float] | None, list[str] | None]:
+        """
+        Returns the objectives, their difficulties (None if no objective has one) and their categories
+        (None if no objective has one). Objectives without a difficulty are given the average difficulty.
+        """
+        objectives, difficulties, categories = ((columns or []) + [[], [], []])[:3]
+        difficulties = difficulties[:len(objectives)] + [''] * (len(objectives) - len(difficulties))
+        categories = categories[:len(objectives)] + [''] * (len(objectives) - len(categories))
+
+        values = []
+        for difficulty in difficulties:
+            try:
+                values.append(float(difficulty))
+            except ValueError:
+                values.append(None)
+        known = [value for value in values if value is not None]
+        average = sum(known) / len(known) if known else 0
+
+        return (
+            objectives,
+            [average if value is None else value for value in values] if known else None,
+            categories if any(categories) else None
+        )
+
+    def generate_board(self, size: int = 5) -> None:
+        # Each board contains size * size cells, all but one of them are different objectives and the
+        # last is a wild card. One of the objectives is chosen as the 8-ball.
+        # Every team gets this board, they all play in one bingosync room and a room has one 5x5 board
+        generator = board.BoardGenerator(self.objectives, self.wild_cards, self.difficulties, self.categories, size)
+        # Seeded from the global generator, so the board only depends on the global seed
+        self.board = generator.generate(seed=random.getrandbits(64))[0]
+
+    def save_snapshot(self) -> None:
+        """
+        Saves everything needed to resume the game to snapshot_path. The file is replaced in one step,
+        so a crash while saving leaves the previous snapshot.
+        """
+        if self.snapshot_path is None:
+            return
 
-        random.shuffle(self.board)
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'board': self.board,
+            'power_ups': self.power_ups,
+            'curses': self.curses,
+            'teams': [team.get_state() for team in self.teams]
+        }
+        temp_path = f'{self.snapshot_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> None:
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise RuntimeError(f'Unable to resume from "{self.snapshot_path}", it was saved by another version')
+
+        self.objectives, self.difficulties, self.categories = [], None, None
+        self.wild_cards = []
+        self.board = snapshot['board']
+        self.power_ups = snapshot['power_ups']
+        self.curses = snapshot['curses']
+        self.teams = [
+            Team(state['spreadsheet_id'], self.power_ups, self.curses, state=state)
+            for state in snapshot['teams']
+        ]
 
     def serialize_board(self) -> str:
-        out = '[\n'
-        for item in self.board:
-            out += '\t{"name": "' + item + '"},\n'
-        # Remove last comma
-        out = out[:-2] + '\n'
-        out += ']'
-        return out
+        # One square per line, json.dumps escapes any quotes or backslashes in objectives
+        return '[\n' + ',\n'.join('\t' + json.dumps({'name': item}) for item in self.board) + '\n]'
     
-    def process(self) -> None:
-        for team in self.teams:
-            team.update() 
+    def process(self) -> list[float]:
+        """
+        Updates every team, at most `workers` at a time. Returns (and stores in team_times) the
+        number of seconds after the start of the tick at which each team finished updating.
+        """
+        start = time.perf_counter()
+
+        # Read every team's probe first, then the columns of the teams whose probe changed.
+        # Each of these is sent as a single batch HTTP request
+        probes = google_sheets.GoogleSheets.read_range_many([
+            (team.sheet, Team.PROBE_RANGE)
+            for team in self.teams
+        ])
+        changed = [team for team, probe in zip(self.teams, probes, strict=True) if team.probe_changed(probe)]
+
+        columns = google_sheets.GoogleSheets.read_columns_many([
+            (team.sheet, 'Game', Team.READ_COLUMNS)
+            for team in changed
+        ]) if changed else []
+        reads = dict(zip(changed, columns, strict=True))
+        for team, read in reads.items():
+            if read is None:
+                # Make sure we try again next tick
+                team.probe = None
+
+        def update(team: Team, columns: list[list[str]] | None) -> tuple[float, bool]:
+            changed = team.update(columns) if columns is not None else False
+            return time.perf_counter() - start, changed
+
+        # Every team is updated exactly once per tick and the tick waits for all of them
+        results = list(self.executor.map(update, self.teams, [reads.get(team) for team in self.teams]))
+        self.team_times = [team_time for team_time, _ in results]
+        if any(changed for _, changed in results):
+            self.save_snapshot()
+        return self.team_times
 
     sheet: google_sheets.GoogleSheets
     objectives: list[str]
+    difficulties: list[float] | None
+    categories: list[str] | None
     wild_cards: list[str]
     power_ups: list[str]
     curses: list[str]
 
     board: list[str]
+    snapshot_path: str | None
 
     teams: list[Team]
+    team_times: list[float]
+    executor: ThreadPoolExecutor
 
 
-def find_image(image: str) -> tuple[int, int]:
-    while True:
-        try:
-            r = pyautogui.locateOnScreen(image, confidence=0.9)
-            if r == None:
-                raise pyautogui.ImageNotFoundException()
-            else:
-                return (int(r.left), int(r.top))
-        except pyautogui.ImageNotFoundException:
-            pass
-
-        time.sleep(0.1)
+def find_image(image: str, timeout: float | None = None) -> tuple[int, int]:
+    # Raises RuntimeError if the image doesn't appear within timeout seconds (screen.TIMEOUT by default)
+    import screen
+    return screen.LOCATOR.find(image, screen.TIMEOUT if timeout is None else timeout)
 
 type ClickCoordinate = Literal[
     'Room Name', 'Password', 'Nickname', 'Game', 'Board', 'Mode', 'Spectator', 'Hide', 'Make Room',
@@ -229,7 +478,30 @@ def get_click_coords() -> dict[ClickCoordinate, tuple[int, int]]:
     }
 
 
-def make_bingosync_room(game: Game, room_name: str):
+def print_room_login(room_name: str) -> None:
+    print('--------ROOM LOGIN INFO--------')
+    print(f'Room Name: {room_name}')
+    print(f'Password: {ROOM_PASSWORD}')
+    print('-------------------------------')
+
+
+def make_bingosync_room(game: Game, room_name: str, url: str = bingosync.BINGOSYNC_URL) -> str:
+    """
+    Creates the room over HTTP, without a browser. Returns the URL of the room.
+    """
+    client = bingosync.BingosyncClient(url)
+    room_url = client.create_room(room_name, ROOM_PASSWORD, game.serialize_board())
+    print_room_login(room_name)
+    print(f'Room URL: {room_url}')
+    return room_url
+
+
+def make_bingosync_room_gui(game: Game, room_name: str):
+    # Creates the room by driving Chrome on the desktop, for when bingosync can't be reached over HTTP.
+    # The GUI libraries are slow to import and need a desktop, so they are only imported here
+    import pyautogui
+    import pyperclip
+
     pyautogui.press('win')
     pyautogui.write('Google Chrome')
     pyautogui.press('enter')
@@ -265,10 +537,7 @@ def make_bingosync_room(game: Game, room_name: str):
 
     pyautogui.click(coords['Make Room'])
 
-    print('--------ROOM LOGIN INFO--------')
-    print(f'Room Name: {room_name}')
-    print(f'Password: {ROOM_PASSWORD}')
-    print('-------------------------------')
+    print_room_login(room_name)
 
 
 def test():
@@ -289,26 +558,119 @@ def test():
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument('--spreadsheet_ids', help='Enter team spreadsheet IDs', type=str, nargs='+')
+    parser.add_argument('--workers', help='Number of teams to update at the same time', type=int, default=4)
+    parser.add_argument('--interval', help='Minimum number of seconds between updates', type=float, default=1)
+    parser.add_argument('--timings', help='Print how long each team took to update every tick', action='store_true')
+    parser.add_argument('--read_quota', help='Sheets API reads allowed per minute', type=int, default=rate_limiter.READ_QUOTA_PER_MINUTE)
+    parser.add_argument('--write_quota', help='Sheets API writes allowed per minute', type=int, default=rate_limiter.WRITE_QUOTA_PER_MINUTE)
+    parser.add_argument('--plan', help='Print the safe interval for this many teams and exit', type=int, metavar='TEAMS')
+    parser.add_argument('--gui_room', help='Create the bingosync room by controlling Chrome instead of over HTTP', action='store_true')
+    parser.add_argument('--bingosync_url', help='Where to create the bingosync room', type=str, default=bingosync.BINGOSYNC_URL)
+    parser.add_argument('--snapshot', help='File the game is saved to, so it can be resumed', type=str, default='game_snapshot.json')
+    parser.add_argument('--resume', help='Continue the game saved in --snapshot without resetting the spreadsheets', action='store_true')
+    parser.add_argument('--master_cache', help='File the master spreadsheet lists are cached in', type=str, default='master_data.json')
+    parser.add_argument('--master_ttl', help='Seconds the cached master lists are used for', type=float, default=master_data.TTL)
+    parser.add_argument('--refresh_master', help='Read the master spreadsheet even if the cache is recent', action='store_true')
+    parser.add_argument('--config', help='JSON file of games to run together in this process (see orchestrator.py)', type=str)
+    parser.add_argument('--stats', help='File to write API usage to every tick (.json for JSON, Prometheus text otherwise)', type=str)
+    parser.add_argument('--compress', help='Gzip large request bodies (not yet checked against the live API)', action='store_true')
     return parser.parse_args()
 
 
-def main(spreadsheet_ids: list[str]) -> None:
-    game = Game(spreadsheet_ids)
+def print_team_times(game: Game, name: str | None = None) -> None:
+    times = ', '.join(f'{t:.2f}s' for t in game.team_times)
+    print(f'{"Teams" if name is None else f"{name}: teams"} updated after: {times}')
+
+
+def print_plan(num_teams: int) -> None:
+    print(f'Fastest safe interval for {num_teams} teams:')
+    print(f'  No team changes:    {Game.plan_interval(num_teams, 0):.1f}s')
+    print(f'  Every team changes: {Game.plan_interval(num_teams):.1f}s')
+
+
+def get_master_cache_path(path: str, master_spreadsheet_id: str) -> str:
+    # Each master spreadsheet needs its own cache file, the default one keeps the default name
+    if master_spreadsheet_id == Game.SPREADSHEET_ID:
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}_{master_spreadsheet_id}{ext}'
+
+
+def start_game(config: orchestrator.GameConfig, args: argparse.Namespace) -> Game:
+    # Provisions the game and creates its room, or resumes it from its snapshot
+    if args.resume:
+        return Game([], args.workers, config.snapshot, resume=True)
+
+    master_spreadsheet_id = config.master_spreadsheet_id or Game.SPREADSHEET_ID
+    master_cache = master_data.MasterDataCache(get_master_cache_path(args.master_cache, master_spreadsheet_id), args.master_ttl)
+    game = Game(
+        config.spreadsheet_ids, args.workers, config.snapshot, master_cache=master_cache,
+        refresh_master=args.refresh_master, master_spreadsheet_id=master_spreadsheet_id
+    )
     game.generate_board()
-    make_bingosync_room(game, 'WatBingo')
+    game.save_snapshot()
+    if args.gui_room:
+        make_bingosync_room_gui(game, config.room_name)
+    else:
+        make_bingosync_room(game, config.room_name, args.bingosync_url)
+    return game
 
-    # This sleep exists to avoid hitting sheets API quota, may need to increase with more teams
-    time.sleep(30)
+
+def run_games(args: argparse.Namespace) -> None:
+    """
+    Runs every game in args.config in this process, sharing the API client and the quota.
+    """
+    configs = orchestrator.load_config(args.config)
+    games = {config.name: start_game(config, args) for config in configs}
+
+    def after_tick(name: str, game: Game) -> None:
+        if args.timings:
+            print_team_times(game, name)
+        if args.stats:
+            usage.USAGE.export(args.stats)
+
+    runner = orchestrator.Orchestrator(games, {config.name: config.weight for config in configs}, args.interval)
+    runner.run(after_tick=after_tick)
+
+
+def main(args: argparse.Namespace) -> None:
+    rate_limiter.set_quotas(args.read_quota, args.write_quota)
+    google_sheets.client.COMPRESS_REQUESTS = args.compress
+    if args.plan is not None:
+        print_plan(args.plan)
+        return
+    if args.config:
+        run_games(args)
+        return
+
+    if args.resume:
+        # The room and board already exist
+        game = Game([], args.workers, args.snapshot, resume=True)
+    else:
+        master_cache = master_data.MasterDataCache(args.master_cache, args.master_ttl)
+        game = Game(list(args.spreadsheet_ids), args.workers, args.snapshot, master_cache=master_cache, refresh_master=args.refresh_master)
+        game.generate_board()
+        game.save_snapshot()
+        if args.gui_room:
+            make_bingosync_room_gui(game, 'WatBingo')
+        else:
+            make_bingosync_room(game, 'WatBingo', args.bingosync_url)
 
     while True:
+        start = time.monotonic()
         game.process()
+        if args.timings:
+            print_team_times(game)
+        if args.stats:
+            usage.USAGE.export(args.stats)
 
-        # Do not reduce this cooldown, may need to be increased with more teams
-        time.sleep(5)
+        # Sheets API calls are paced to stay within quota by google_sheets, so ticks run as fast as
+        # the quota allows. This is only a lower bound on how long a tick takes
+        time.sleep(max(0, args.interval - (time.monotonic() - start)))
 
 
 if __name__ == '__main__':
     try:
-        main(list(parse_args().spreadsheet_ids))
+        main(parse_args())
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import time
+import typing
+
+import google_sheets
+
+type JSON = typing.Any
+
+# Everything the game reads from the master spreadsheet, all of it is read in one values.batchGet
+RANGES = {
+    'objectives': 'Objectives!A2:A',
+    'difficulties': 'Objectives!B2:B',
+    'categories': 'Objectives!C2:C',
+    'wild_cards': 'Wild Cards!A2:A',
+    'power_ups': 'Power-ups!A2:A',
+    'curses': 'Curses!A2:A'
+}
+
+# Seconds before cached master data is read again
+TTL = 3600
+
+
+def get_hash(data: JSON) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class MasterDataCache:
+    """
+    Keeps the master spreadsheet's lists in a local file, so restarts within ttl seconds don't read
+    the master spreadsheet at all.
+
+    Args:
+        path: The cache file.
+        ttl: Seconds the cached data is used for before it is read again.
+    """
+
+    def __init__(self, path: str, ttl: float = TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    def read_cache(self, spreadsheet_id: str) -> tuple[dict[str, list[str]], float] | None:
+        # Returns the cached data and when it was fetched, None if there is no usable cache
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get('spreadsheet_id') != spreadsheet_id or cache.get('hash') != get_hash(cache.get('data')):
+            # For another spreadsheet, or edited by hand
+            return None
+        return cache['data'], cache['fetched']
+
+    def write_cache(self, spreadsheet_id: str, data: dict[str, list[str]]) -> None:
+        cache = {'spreadsheet_id': spreadsheet_id, 'fetched': time.time(), 'hash': get_hash(data), 'data': data}
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(temp_path, self.path)
+
+    def load(self, spreadsheet: google_sheets.GoogleSheets, refresh: bool = False) -> dict[str, list[str]] | None:
+        """
+        Returns the master data (see RANGES) from the cache, or from the spreadsheet if the cache is
+        missing, older than ttl or refresh is True. If the spreadsheet can't be read, falls back to the
+        cache however old it is. Returns None if neither worked.
+        """
+        cached = self.read_cache(spreadsheet.spreadsheet_id)
+        if cached is not None and not refresh and time.time() - cached[1] < self.ttl:
+            return cached[0]
+
+        data = read_master_data(spreadsheet)
+        if data is None:
+            if cached is None:
+                return None
+            print(f'Unable to read the master spreadsheet, using master data cached {time.time() - cached[1]:.0f}s ago')
+            return cached[0]
+
+        self.write_cache(spreadsheet.spreadsheet_id, data)
+        return data
+
+    path: str
+    ttl: float
+
+
+def read_master_data(spreadsheet: google_sheets.GoogleSheets) -> dict[str, list[str]] | None:
+    # One values.batchGet for every list, None on error
+    columns = spreadsheet.read_column_ranges(list(RANGES.values()))
+    if columns is None:
+        return None
+    return dict(zip(RANGES, columns, strict=True))
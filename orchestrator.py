@@ -0,0 +1,214 @@
+import heapq
+import json
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from google_sheets import rate_limiter, usage
+
+if typing.TYPE_CHECKING:
+    from main import Game
+
+# Games whose ticks can run at the same time
+WORKERS = 4
+
+
+class GameConfig:
+    """
+    One game in a config file (see load_config).
+
+    Args:
+        name: Unique name of the game, used in logs and for the default room name and snapshot file.
+        spreadsheet_ids: The spreadsheet ID of each team's game spreadsheet.
+        master_spreadsheet_id: Spreadsheet the objectives, wild cards, power-ups and curses are read
+            from, None for Game.SPREADSHEET_ID.
+        room_name: Name of the bingosync room, the name of the game by default.
+        snapshot: File the game is saved to, game_snapshot_<name>.json by default.
+        weight: Share of the quota relative to other games, the number of teams by default so every
+            team gets the same share whichever game it is in.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        spreadsheet_ids: list[str],
+        master_spreadsheet_id: str | None = None,
+        room_name: str | None = None,
+        snapshot: str | None = None,
+        weight: float | None = None
+    ) -> None:
+        self.name = name
+        self.spreadsheet_ids = list(spreadsheet_ids)
+        self.master_spreadsheet_id = master_spreadsheet_id
+        self.room_name = name if room_name is None else room_name
+        self.snapshot = f'game_snapshot_{name}.json' if snapshot is None else snapshot
+        self.weight = len(self.spreadsheet_ids) if weight is None else weight
+
+    name: str
+    spreadsheet_ids: list[str]
+    master_spreadsheet_id: str | None
+    room_name: str
+    snapshot: str
+    weight: float
+
+
+def load_config(path: str) -> list[GameConfig]:
+    """
+    Reads the games to run from a JSON file like:
+
+        {"games": [
+            {"name": "Bracket A", "spreadsheet_ids": ["...", "..."], "master_spreadsheet_id": "..."},
+            {"name": "Bracket B", "spreadsheet_ids": ["..."], "room_name": "WatBingo B", "weight": 2}
+        ]}
+
+    Only name and spreadsheet_ids are required, see GameConfig for the rest.
+    Raises ValueError if the config is invalid.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    games = []
+    for i, game in enumerate(config.get('games', [])):
+        if not game.get('name') or not game.get('spreadsheet_ids'):
+            raise ValueError(f'Game {i} in "{path}" needs a name and spreadsheet_ids')
+        games.append(GameConfig(
+            game['name'],
+            game['spreadsheet_ids'],
+            game.get('master_spreadsheet_id'),
+            game.get('room_name'),
+            game.get('snapshot'),
+            game.get('weight')
+        ))
+
+    if not games:
+        raise ValueError(f'No games in "{path}"')
+    names = [game.name for game in games]
+    if len(set(names)) != len(names):
+        raise ValueError(f'Game names in "{path}" must be unique')
+    snapshots = [game.snapshot for game in games]
+    if len(set(snapshots)) != len(snapshots):
+        raise ValueError(f'Games in "{path}" must not share a snapshot file')
+    return games
+
+
+class Orchestrator:
+    """
+    Runs the ticks of many games in one process. All games share the Sheets API client and the
+    limiters in google_sheets, and their ticks are run by one scheduler: each game is ticked again
+    once the calls its last tick made fit in its share of the quota, so a busy game slows itself
+    down instead of the others.
+
+    Args:
+        games: Game name -> game.
+        weights: Game name -> share of the quota relative to other games, equal shares by default.
+        interval: Fewest seconds between the starts of two ticks of the same game.
+        workers: Games whose ticks can run at the same time.
+    """
+
+    def __init__(
+        self,
+        games: dict[str, 'Game'],
+        weights: dict[str, float] | None = None,
+        interval: float = 0,
+        workers: int = WORKERS
+    ) -> None:
+        weights = {name: 1.0 for name in games} if weights is None else weights
+        total = sum(weights[name] for name in games)
+        self.games = games
+        self.shares = {name: weights[name] / total for name in games}
+        self.interval = interval
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.condition = threading.Condition()
+        self.queue = []
+        self.running = 0
+        self.ticks = {name: 0 for name in games}
+        self.stopped = False
+
+    def get_calls(self, name: str) -> tuple[int, int]:
+        # Read and write calls made for the game's teams so far, see usage.USAGE
+        reads, writes = 0, 0
+        for team in self.games[name].teams:
+            counts = usage.USAGE.get(team.sheet.spreadsheet_id)
+            reads += counts['read_calls']
+            writes += counts['write_calls']
+        return reads, writes
+
+    def get_delay(self, name: str, reads: int, writes: int) -> float:
+        """
+        Returns the seconds the game's share of the quota needs to make up for the given calls.
+        """
+        share = self.shares[name]
+        return max(
+            reads / (rate_limiter.LIMITERS['read'].max_rate * share),
+            writes / (rate_limiter.LIMITERS['write'].max_rate * share)
+        )
+
+    def __tick(self, name: str, after_tick: typing.Callable[[str, 'Game'], None] | None) -> None:
+        start = time.monotonic()
+        reads, writes = self.get_calls(name)
+        try:
+            self.games[name].process()
+            if after_tick is not None:
+                after_tick(name, self.games[name])
+        except Exception as e:
+            # One broken game must not stop the others, it is tried again next tick
+            print(f'Game "{name}" failed to update: {e!r}')
+
+        new_reads, new_writes = self.get_calls(name)
+        delay = max(self.interval, self.get_delay(name, new_reads - reads, new_writes - writes))
+        with self.condition:
+            heapq.heappush(self.queue, (start + delay, name))
+            self.ticks[name] += 1
+            self.running -= 1
+            self.condition.notify_all()
+
+    def run(self, duration: float | None = None, after_tick: typing.Callable[[str, 'Game'], None] | None = None) -> None:
+        """
+        Ticks every game until stop is called or for duration seconds, then waits for running ticks.
+
+        Args:
+            after_tick: Called with the name of the game and the game after each tick.
+        """
+        end = None if duration is None else time.monotonic() + duration
+        with self.condition:
+            self.stopped = False
+            now = time.monotonic()
+            self.queue = [(now, name) for name in self.games]
+            heapq.heapify(self.queue)
+
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    if self.stopped or (end is not None and now >= end):
+                        self.stopped = True
+                        self.condition.wait_for(lambda: self.running == 0)
+                        return
+                    if self.queue and self.queue[0][0] <= now:
+                        break
+                    due = self.queue[0][0] if self.queue else None
+                    if end is not None:
+                        due = end if due is None else min(due, end)
+                    self.condition.wait(None if due is None else due - now)
+                _, name = heapq.heappop(self.queue)
+                self.running += 1
+            self.executor.submit(self.__tick, name, after_tick)
+
+    def stop(self) -> None:
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    games: dict[str, 'Game']
+    # Game name -> fraction of the quota
+    shares: dict[str, float]
+    interval: float
+    executor: ThreadPoolExecutor
+    condition: threading.Condition
+    # (time.monotonic() the game is due, game name), a heap
+    queue: list[tuple[float, str]]
+    running: int
+    # Game name -> ticks finished
+    ticks: dict[str, int]
+    stopped: bool
@@ -0,0 +1,134 @@
+import time
+
+import pyautogui
+from PIL import Image
+
+# Screenshots are first searched at 1/DOWNSCALE of their size, then the match is refined at full size
+DOWNSCALE = 4
+COARSE_CONFIDENCE = 0.8
+CONFIDENCE = 0.9
+
+# Pixels around a coarse match (or the last match) that are searched at full size
+MARGIN = 2 * DOWNSCALE + 8
+
+# Defaults for ScreenLocator.find
+TIMEOUT = 10.0  # Seconds
+MAX_ATTEMPTS = 50
+RETRY_INTERVAL = 0.1  # Seconds
+
+type Region = tuple[int, int, int, int]  # left, top, width, height
+
+
+class ScreenLocator:
+    """
+    Finds images on the screen quickly. Each template is loaded once, the screen is searched at a
+    lower resolution first and the match refined around where it was found. Where each image was
+    last found is checked before anything else.
+
+    Positions are in screenshot pixels, which are physical pixels and not the logical ones of
+    pyautogui.size() on a scaled display.
+    """
+
+    def __init__(self, confidence: float = CONFIDENCE, downscale: int = DOWNSCALE) -> None:
+        self.confidence = confidence
+        self.downscale = downscale
+        self.templates = {}
+        self.last_found = {}
+        self.screen_size = None
+
+    def get_template(self, image: str) -> tuple[Image.Image, Image.Image]:
+        # The template at full size and downscaled, loaded on first use
+        if image not in self.templates:
+            template = Image.open(image).convert('RGB')
+            self.templates[image] = (template, template.reduce(self.downscale))
+        return self.templates[image]
+
+    @staticmethod
+    def match(needle: Image.Image, haystack: Image.Image, confidence: float) -> Region | None:
+        try:
+            box = pyautogui.locate(needle, haystack, confidence=confidence)
+        except pyautogui.ImageNotFoundException:
+            return None
+        if box is None:
+            return None
+        return (int(box.left), int(box.top), int(box.width), int(box.height))
+
+    @staticmethod
+    def around(region: Region, margin: int, bounds: tuple[int, int]) -> Region:
+        # The region grown by margin on every side, kept within bounds (width, height)
+        left = max(0, region[0] - margin)
+        top = max(0, region[1] - margin)
+        right = min(bounds[0], region[0] + region[2] + margin)
+        bottom = min(bounds[1], region[1] + region[3] + margin)
+        return (left, top, right - left, bottom - top)
+
+    def refine(self, template: Image.Image, screenshot: Image.Image, region: Region) -> Region | None:
+        left, top, width, height = region
+        if width < template.width or height < template.height:
+            return None
+        found = ScreenLocator.match(template, screenshot.crop((left, top, left + width, top + height)), self.confidence)
+        if found is None:
+            return None
+        return (left + found[0], top + found[1], found[2], found[3])
+
+    def locate(self, image: str) -> Region | None:
+        """
+        Looks for image on the screen once. Returns where it is, or None if it isn't on the screen.
+        """
+        template, small_template = self.get_template(image)
+
+        # Windows rarely move, so check where the image was last time with a small screenshot
+        last = self.last_found.get(image)
+        if last is not None and self.screen_size is not None:
+            region = ScreenLocator.around(last, MARGIN, self.screen_size)
+            found = self.refine(template, pyautogui.screenshot(region=region), (0, 0, region[2], region[3]))
+            if found is not None:
+                found = (region[0] + found[0], region[1] + found[1], found[2], found[3])
+                self.last_found[image] = found
+                return found
+
+        screenshot = pyautogui.screenshot()
+        self.screen_size = screenshot.size
+        coarse = ScreenLocator.match(small_template, screenshot.reduce(self.downscale), COARSE_CONFIDENCE)
+        if coarse is None:
+            return None
+
+        scaled = tuple(value * self.downscale for value in coarse)
+        found = self.refine(template, screenshot, ScreenLocator.around(scaled, MARGIN, screenshot.size))
+        if found is not None:
+            self.last_found[image] = found
+        return found
+
+    def find(
+        self,
+        image: str,
+        timeout: float = TIMEOUT,
+        max_attempts: int = MAX_ATTEMPTS,
+        interval: float = RETRY_INTERVAL
+    ) -> tuple[int, int]:
+        """
+        Waits for image to appear on the screen. Returns the position of its top left corner.
+        Raises RuntimeError if it isn't found within timeout seconds or max_attempts attempts.
+        """
+        deadline = time.monotonic() + timeout
+        for attempt in range(max_attempts):
+            found = self.locate(image)
+            if found is not None:
+                return (found[0], found[1])
+            if attempt == max_attempts - 1 or time.monotonic() + interval > deadline:
+                break
+            time.sleep(interval)
+
+        raise RuntimeError(f'Unable to find "{image}" on the screen')
+
+    confidence: float
+    downscale: int
+    # Image path -> (full size, downscaled)
+    templates: dict[str, tuple[Image.Image, Image.Image]]
+    last_found: dict[str, Region]
+    # (width, height) of the last full screenshot, None before the first
+    screen_size: tuple[int, int] | None
+
+
+# Shared so templates and last positions are remembered between calls
+LOCATOR = ScreenLocator()
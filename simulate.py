@@ -0,0 +1,234 @@
+import argparse
+import heapq
+import random
+import time
+
+import main as bingo
+from google_sheets import client, emulator, rate_limiter, usage
+
+type Action = tuple[float, int, str]  # Simulated time, team, 'power_up' or 'curse'
+
+
+def percentile(values: list[float], percent: float) -> float:
+    # Nearest rank, 0 for no values
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))]
+
+
+def get_call_totals() -> tuple[int, int, int, int]:
+    # Read calls, write calls, bytes sent and bytes received for every spreadsheet so far
+    spreadsheets = usage.USAGE.snapshot()['spreadsheets'].values()
+    return tuple(sum(totals[name] for totals in spreadsheets) for name in usage.COUNTERS)
+
+
+class LoadSimulator:
+    """
+    Runs a Game against the emulator with synthetic players, to see how it behaves with many teams and
+    busy players before the real event. Players complete power-ups and use curses at random (as Poisson
+    processes), and the real Game.process runs every interval simulated seconds. Only the ticks take
+    real time, the time between them is skipped.
+
+    Args:
+        num_teams: Number of teams in the game.
+        players: Players on each team.
+        power_up_rate: Power-ups each player completes per minute, 0 for none.
+        curse_rate: Curses each player uses per minute if their team has any left to use, 0 for none.
+        interval: Simulated seconds between the starts of ticks, ticks that take longer start late.
+        latency: Seconds each emulated API call takes.
+        workers: Teams updated at the same time, see Game.
+        num_power_ups: Power-ups on each team's sheet.
+        seed: Seed for the players and the game.
+    """
+
+    def __init__(
+        self,
+        num_teams: int,
+        players: int,
+        power_up_rate: float,
+        curse_rate: float,
+        interval: float,
+        latency: float,
+        workers: int,
+        num_power_ups: int = 20,
+        seed: int = 0
+    ) -> None:
+        self.sheets = emulator.SheetsEmulator(latency=latency, seed=seed)
+        self.team_ids = self.sheets.add_game(bingo.Game.SPREADSHEET_ID, num_teams, num_power_ups)
+        self.players = players
+        self.rates = {'power_up': power_up_rate * players / 60, 'curse': curse_rate * players / 60}
+        self.interval = interval
+        self.workers = workers
+        self.num_power_ups = num_power_ups
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.tick_times = []
+        self.tick_calls = []
+        self.tick_bytes = []
+        self.curse_lags = []
+        self.actions = {'power_up': 0, 'curse': 0}
+        # Team -> simulated times of completed power-ups whose curse hasn't appeared yet, oldest first
+        self.pending = [[] for _ in self.team_ids]
+        self.curses_seen = [0 for _ in self.team_ids]
+
+    def next_action(self, now: float, team: int, kind: str) -> Action:
+        # Time between the actions of a Poisson process is exponentially distributed
+        return (now + self.random.expovariate(self.rates[kind]), team, kind)
+
+    def act(self, action: Action) -> None:
+        # Ticks a random unticked box in the power-ups (column A) or curses (column D) of the team's sheet
+        when, team, kind = action
+        sheet = self.sheets.get_spreadsheet(self.team_ids[team]).get_sheet_by_title('Game')
+        if kind == 'power_up':
+            rows = [row for row in range(1, self.num_power_ups + 1) if sheet.get_value(row, 0) != 'TRUE']
+            column = 0
+        else:
+            rows = [row for row in range(1, sheet.row_count()) if sheet.get_value(row, 4) and sheet.get_value(row, 3) != 'TRUE']
+            column = 3
+        if not rows:
+            return
+
+        sheet.set_value(self.random.choice(rows), column, 'TRUE')
+        self.actions[kind] += 1
+        if kind == 'power_up':
+            self.pending[team].append(when)
+
+    def check_curses(self, now: float) -> None:
+        # Every completed power-up gives one curse, so each new curse on a sheet answers the oldest completion
+        for team, team_id in enumerate(self.team_ids):
+            sheet = self.sheets.get_spreadsheet(team_id).get_sheet_by_title('Game')
+            curses = sum(1 for row in range(1, sheet.row_count()) if sheet.get_value(row, 4))
+            for _ in range(curses - self.curses_seen[team]):
+                self.curse_lags.append(now - self.pending[team].pop(0))
+            self.curses_seen[team] = curses
+
+    def run(self, duration: float) -> None:
+        """
+        Simulates duration seconds of the game.
+        """
+        client.set_service_factory(lambda: self.sheets)
+        # Simulated time passes faster than real time, the limiters would slow it back down.
+        # Calls per tick are reported instead, see print_report
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+        usage.USAGE.reset()
+        random.seed(self.seed)
+        try:
+            game = bingo.Game(self.team_ids, self.workers)
+            # A rate of 0 turns that kind of action off
+            actions = [
+                self.next_action(0, team, kind)
+                for team in range(len(self.team_ids)) for kind, rate in self.rates.items() if rate > 0
+            ]
+            heapq.heapify(actions)
+
+            now = 0.0
+            while now < duration:
+                while actions and actions[0][0] <= now:
+                    action = heapq.heappop(actions)
+                    self.act(action)
+                    heapq.heappush(actions, self.next_action(action[0], action[1], action[2]))
+
+                before = get_call_totals()
+                start = time.perf_counter()
+                game.process()
+                tick_time = time.perf_counter() - start
+                after = get_call_totals()
+
+                self.tick_times.append(tick_time)
+                self.tick_calls.append((after[0] - before[0], after[1] - before[1]))
+                self.tick_bytes.append((after[2] - before[2], after[3] - before[3]))
+                # The curses are on the sheets once the tick ends
+                self.check_curses(now + tick_time)
+                now += max(self.interval, tick_time)
+        finally:
+            client.set_service_factory(None)
+            rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def print_report(self, read_quota: int, write_quota: int) -> None:
+        ticks = len(self.tick_times)
+        reads = [calls[0] for calls in self.tick_calls]
+        writes = [calls[1] for calls in self.tick_calls]
+        period = max(self.interval, sum(self.tick_times) / ticks)
+
+        def summary(values: list[float], scale: float = 1, unit: str = '') -> str:
+            return ', '.join(
+                f'{name} {percentile(values, percent) * scale:.1f}{unit}'
+                for name, percent in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))
+            )
+
+        print(f'{len(self.team_ids)} teams of {self.players} players, a tick every {self.interval:.1f} s, {ticks} ticks (emulated):')
+        print(f'  Actions:         {self.actions["power_up"]} power-ups completed, {self.actions["curse"]} curses used')
+        print(f'  Tick latency:    {summary(self.tick_times, 1000, " ms")}')
+        print(f'  Reads per tick:  {summary(reads)}')
+        print(f'  Writes per tick: {summary(writes)}')
+        print(f'  Bytes per tick:  {sum(sent for sent, _ in self.tick_bytes) / ticks:.0f} sent, '
+              f'{sum(received for _, received in self.tick_bytes) / ticks:.0f} received on average')
+        print(f'  Curse lag:       {summary(self.curse_lags, unit=" s")}')
+        for kind, calls, quota in (('Read', reads, read_quota), ('Write', writes, write_quota)):
+            per_minute = sum(calls) / ticks * 60 / period
+            print(f'  {kind + " quota:":<17}{per_minute:.0f} calls/min, {per_minute / quota:.0%} of {quota}')
+
+    sheets: emulator.SheetsEmulator
+    team_ids: list[str]
+    players: int
+    # 'power_up' or 'curse' -> actions per second by each team
+    rates: dict[str, float]
+    interval: float
+    workers: int
+    num_power_ups: int
+    seed: int
+    random: random.Random
+
+    tick_times: list[float]
+    # (reads, writes) and (bytes sent, bytes received) of each tick
+    tick_calls: list[tuple[int, int]]
+    tick_bytes: list[tuple[int, int]]
+    # Simulated seconds from completing a power-up to its curse being on the sheet
+    curse_lags: list[float]
+    actions: dict[str, int]
+    pending: list[list[float]]
+    curses_seen: list[int]
+
+
+def non_negative(value: str) -> float:
+    rate = float(value)
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f'must not be negative: {value}')
+    return rate
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teams', help='Number of teams', type=int, default=30)
+    parser.add_argument('--players', help='Players on each team', type=int, default=4)
+    parser.add_argument('--power_up_rate', help='Power-ups each player completes per minute, 0 for none', type=non_negative, default=0.1)
+    parser.add_argument('--curse_rate', help='Curses each player uses per minute, 0 for none', type=non_negative, default=0.1)
+    parser.add_argument('--power_ups', help='Power-ups on each team sheet', type=int, default=20)
+    parser.add_argument('--interval', help='Seconds between ticks, by default the fastest the quotas allow', type=float)
+    parser.add_argument('--duration', help='Simulated seconds to run for', type=float, default=600)
+    parser.add_argument('--latency', help='Seconds each emulated API call takes', type=float, default=0.1)
+    parser.add_argument('--workers', help='Number of teams to update at the same time', type=int, default=4)
+    parser.add_argument('--read_quota', help='Sheets API reads allowed per minute', type=int, default=rate_limiter.READ_QUOTA_PER_MINUTE)
+    parser.add_argument('--write_quota', help='Sheets API writes allowed per minute', type=int, default=rate_limiter.WRITE_QUOTA_PER_MINUTE)
+    parser.add_argument('--seed', help='Seed for the players and the game', type=int, default=0)
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> None:
+    interval = args.interval
+    if interval is None:
+        rate_limiter.set_quotas(args.read_quota, args.write_quota)
+        interval = bingo.Game.plan_interval(args.teams)
+
+    simulator = LoadSimulator(
+        args.teams, args.players, args.power_up_rate, args.curse_rate, interval,
+        args.latency, args.workers, args.power_ups, args.seed
+    )
+    simulator.run(args.duration)
+    simulator.print_report(args.read_quota, args.write_quota)
+
+
+if __name__ == '__main__':
+    main(parse_args())
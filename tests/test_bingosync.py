@@ -0,0 +1,56 @@
+import json
+import unittest
+import urllib.parse
+from unittest import mock
+
+import bingosync
+import main
+from google_sheets import client, emulator, rate_limiter
+
+
+class BingosyncClientTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = bingosync.StandInServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = bingosync.BingosyncClient(self.server.url)
+
+        self.sheets = emulator.SheetsEmulator(seed=0)
+        client.set_service_factory(lambda: self.sheets)
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+        self.game = main.Game(self.sheets.add_game(main.Game.SPREADSHEET_ID, 1))
+
+    def tearDown(self) -> None:
+        client.set_service_factory(None)
+        rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def get_room(self, url: str) -> dict[str, str]:
+        room_id = bingosync.ROOM_PATH_REGEX.match(urllib.parse.urlparse(url).path).group(1)
+        return self.server.rooms[room_id]
+
+    def test_create_room(self) -> None:
+        self.game.generate_board()
+        url = self.client.create_room('WatBingo', 'password', self.game.serialize_board())
+
+        room = self.get_room(url)
+        self.assertEqual(room['room_name'], 'WatBingo')
+        self.assertEqual(room['passphrase'], 'password')
+        # The token came from the form, and was sent back with the cookie from the same session
+        self.assertEqual(room[bingosync.CSRF_FIELD], self.server.csrf_token)
+        self.assertEqual([square['name'] for square in json.loads(room['custom_json'])], self.game.board)
+
+    def test_bad_csrf_token(self) -> None:
+        with mock.patch.object(self.client, 'get_csrf_token', return_value='not the token'):
+            with self.assertRaisesRegex(RuntimeError, 'CSRF verification failed'):
+                self.client.create_room('WatBingo', 'password', self.game.serialize_board())
+        self.assertEqual(self.server.rooms, {})
+
+    def test_board_is_escaped(self) -> None:
+        self.game.board = ['Say "bingo"', 'C:\\Games\\', '\\"', 'Tab\there'] + [f'Objective {i}' for i in range(21)]
+        url = self.client.create_room('WatBingo', 'password', self.game.serialize_board())
+
+        board = json.loads(self.get_room(url)['custom_json'])
+        self.assertEqual([square['name'] for square in board], self.game.board)
+
+
+if __name__ == '__main__':
+    unittest.main()
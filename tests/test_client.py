@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+import httplib2
+
+from google_sheets import client, emulator, rate_limiter
+
+
+class FlakyRequest:
+    # Fails with each of errors in turn, then succeeds
+    def __init__(self, errors: list[Exception]) -> None:
+        self.errors = list(errors)
+
+    def execute(self) -> dict:
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'ok': True}
+
+
+class ExecuteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+        patcher = mock.patch.object(client, 'backoff_delay', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def test_connection_errors_are_retried(self) -> None:
+        request = FlakyRequest([TimeoutError(), ConnectionResetError(), httplib2.ServerNotFoundError()])
+        self.assertEqual(client.execute(request, 'read'), {'ok': True})
+
+    def test_other_errors_are_raised(self) -> None:
+        with self.assertRaises(ValueError):
+            client.execute(FlakyRequest([ValueError()]), 'read')
+
+
+class ExecuteBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sheets = emulator.SheetsEmulator(seed=0)
+        self.sheets.add_spreadsheet('spreadsheet', {'Game': [['a']]})
+        client.set_service_factory(lambda: self.sheets)
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+
+    def tearDown(self) -> None:
+        client.set_service_factory(None)
+        rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def test_rate_recovers_after_successful_batches(self) -> None:
+        limiter = rate_limiter.LIMITERS['read']
+        for _ in range(3):
+            limiter.throttle()
+        self.assertLess(limiter.rate, limiter.max_rate)
+
+        for _ in range(20):
+            request = self.sheets.spreadsheets().values().get(spreadsheetId='spreadsheet', range='Game!A1')
+            [(response, error)] = client.execute_batch([request], 'read')
+            self.assertIsNone(error)
+        self.assertEqual(limiter.rate, limiter.max_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
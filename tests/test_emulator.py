@@ -0,0 +1,47 @@
+import unittest
+
+from googleapiclient.http import HttpError
+
+import main
+from google_sheets import emulator
+
+
+class FakeSpreadsheetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.spreadsheet = emulator.FakeSpreadsheet('spreadsheet')
+        self.sheet = self.spreadsheet.add_sheet('Game', [['a', 'b']])
+
+    def test_failed_batch_changes_nothing(self) -> None:
+        merge = {'mergeCells': {'range': {'sheetId': 0, 'startRowIndex': 0, 'endRowIndex': 1, 'startColumnIndex': 0, 'endColumnIndex': 2}}}
+        update = {'updateCells': {
+            'start': {'sheetId': 0, 'rowIndex': 0, 'columnIndex': 0},
+            'rows': [{'values': [{'userEnteredValue': {'stringValue': 'c'}}]}],
+            'fields': 'userEnteredValue'
+        }}
+        self.spreadsheet.batch_update({'requests': [merge]})
+
+        # The second merge overlaps the first, so the update before it must not be applied either
+        with self.assertRaises(HttpError):
+            self.spreadsheet.batch_update({'requests': [update, merge]})
+        self.assertEqual(self.sheet.get_value(0, 0), 'a')
+        self.assertEqual(self.sheet.merges, [(0, 1, 0, 2)])
+
+        self.spreadsheet.batch_update({'requests': [update]})
+        self.assertEqual(self.sheet.get_value(0, 0), 'c')
+
+    def test_ticked_rows_formula(self) -> None:
+        # The probe formula of main.Team, rows below the header whose box in column A is ticked
+        self.sheet.set_value(0, 5, main.Team.HEADER.cells[5].data)
+        self.assertEqual(self.sheet.get_value(0, 5), '')
+        for row in (1, 3, 4):
+            self.sheet.set_value(row, 0, 'TRUE')
+        self.sheet.set_value(2, 0, 'FALSE')
+        self.assertEqual(self.sheet.get_value(0, 5), '2,4,5')
+
+    def test_other_formulas_read_as_text(self) -> None:
+        self.sheet.set_value(0, 5, '=SUM(A1:A3)')
+        self.assertEqual(self.sheet.get_value(0, 5), '=SUM(A1:A3)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from google_sheets import client, emulator, rate_limiter
+from google_sheets.google_sheets import DEFAULT_STYLE, Cell, GoogleSheets, Row, Sheet
+
+
+def make_sheet(rows: list[list[Cell]]) -> Sheet:
+    return Sheet(0, Row([Cell('Header', bold=True)]), [Row(cells) for cells in rows])
+
+
+class DiffWriteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sheets = emulator.SheetsEmulator(seed=0)
+        client.set_service_factory(lambda: self.sheets)
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+        self.sheets.add_spreadsheet('diff', {'Game': []})
+        self.sheets.add_spreadsheet('full', {'Game': []})
+
+    def tearDown(self) -> None:
+        client.set_service_factory(None)
+        rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def get_state(self, spreadsheet_id: str) -> tuple:
+        # Values, formats and merges of the sheet. Fields that were cleared are left out, and so is the
+        # default format, which the diff writes where a formatted cell was but looks like a cleared cell
+        scratch = emulator.FakeSpreadsheet('scratch')
+        scratch.add_sheet('Game')
+        scratch.batch_update({'requests': [DEFAULT_STYLE.get_format_request(0, 0, 1, 0, 1)]})
+        default_format = scratch.get_sheet(0).cells[(0, 0)]['userEnteredFormat']
+
+        sheet = self.sheets.get_spreadsheet(spreadsheet_id).get_sheet_by_title('Game')
+        cells = {}
+        for position, cell in sheet.cells.items():
+            cell = {name: value for name, value in cell.items() if value != {} and value != default_format}
+            if cell:
+                cells[position] = cell
+        return sheet.values, cells, sorted(sheet.merges)
+
+    def assert_diff_matches_rewrite(self, old: list[list[Cell]], new: list[list[Cell]]) -> None:
+        diffed = GoogleSheets('diff')
+        diffed.add_sheet(make_sheet(old))
+        diffed.write()
+        diffed.add_sheet(make_sheet(new))
+        diffed.write()
+
+        rewritten = GoogleSheets('full')
+        rewritten.add_sheet(make_sheet(new))
+        rewritten.write()
+
+        self.assertEqual(self.get_state('diff'), self.get_state('full'))
+
+    def test_values(self) -> None:
+        self.assert_diff_matches_rewrite(
+            [[Cell('a'), Cell('b')], [Cell('c')]],
+            [[Cell('a'), Cell('')], [Cell('d'), Cell('e')], [Cell('f')]]
+        )
+
+    def test_formats(self) -> None:
+        self.assert_diff_matches_rewrite(
+            [[Cell('FALSE', checkbox=True), Cell('2024-01-01 12:00:00', datetime='yyyy-mm-dd hh:mm')]],
+            [[Cell('x', cell_colour='Red'), Cell('y', bold=True)]]
+        )
+
+    def test_merge_moves_left(self) -> None:
+        # The old merge of B:C overlaps the new merge of A:B, so it has to be undone first
+        self.assert_diff_matches_rewrite(
+            [[Cell('x'), Cell('y', length=2)]],
+            [[Cell('x', length=2), Cell('z')]]
+        )
+
+    def test_merge_moves_right(self) -> None:
+        self.assert_diff_matches_rewrite(
+            [[Cell('x', length=2), Cell('z')], [Cell('w', length=3)]],
+            [[Cell('x'), Cell('y', length=2)], [Cell('w'), Cell('v', length=2)]]
+        )
+
+    def test_rows_removed(self) -> None:
+        self.assert_diff_matches_rewrite(
+            [[Cell('x', length=2)], [Cell('TRUE', checkbox=True)]],
+            [[Cell('x')]]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
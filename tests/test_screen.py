@@ -0,0 +1,99 @@
+import collections
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import screen
+
+Box = collections.namedtuple('Box', 'left top width height')
+
+
+def locate(needle: Image.Image, haystack: Image.Image, **kwargs) -> Box | None:
+    # Exact match, enough for the made up screens below
+    needle_pixels = needle.load()
+    haystack_pixels = haystack.load()
+    for top in range(haystack.height - needle.height + 1):
+        for left in range(haystack.width - needle.width + 1):
+            if all(
+                haystack_pixels[left + x, top + y] == needle_pixels[x, y]
+                for y in range(needle.height) for x in range(needle.width)
+            ):
+                return Box(left, top, needle.width, needle.height)
+    return None
+
+
+class ScreenLocatorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.image = os.path.join(directory.name, 'image.png')
+        template = Image.new('RGB', (8, 8), (255, 0, 0))
+        template.paste((0, 0, 255), (0, 0, 4, 4))
+        template.save(self.image)
+
+        self.screen = Image.new('RGB', (64, 48), (255, 255, 255))
+        self.screen.paste(template, (44, 32))
+        self.screenshots = []
+        self.now = 0.0
+
+        def screenshot(region: screen.Region | None = None) -> Image.Image:
+            self.screenshots.append(region)
+            if region is None:
+                return self.screen.copy()
+            left, top, width, height = region
+            return self.screen.crop((left, top, left + width, top + height))
+
+        def sleep(seconds: float) -> None:
+            self.now += seconds
+
+        # A display scaled by 2, so pyautogui.size() is half the size of a screenshot
+        for name, value in (('screenshot', screenshot), ('locate', locate), ('size', lambda: (32, 24))):
+            patcher = mock.patch.object(screen.pyautogui, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, value in (('monotonic', lambda: self.now), ('sleep', sleep)):
+            patcher = mock.patch.object(screen.time, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.locator = screen.ScreenLocator()
+
+    def test_locate(self) -> None:
+        self.assertEqual(self.locator.locate(self.image), (44, 32, 8, 8))
+        self.assertEqual(self.screenshots, [None])
+
+        # Found again with a small screenshot around where it was, in the same pixels as the full one
+        self.assertEqual(self.locator.locate(self.image), (44, 32, 8, 8))
+        self.assertEqual(len(self.screenshots), 2)
+        self.assertIsNotNone(self.screenshots[1])
+
+    def test_locate_after_move(self) -> None:
+        self.locator.locate(self.image)
+        self.screen.paste((255, 255, 255), (0, 0, 64, 48))
+        self.screen.paste(Image.open(self.image), (4, 8))
+        self.assertEqual(self.locator.locate(self.image), (4, 8, 8, 8))
+        self.assertIsNone(self.screenshots[-1])
+
+    def test_find(self) -> None:
+        self.assertEqual(self.locator.find(self.image), (44, 32))
+
+    def test_find_max_attempts(self) -> None:
+        self.screen.paste((255, 255, 255), (0, 0, 64, 48))
+        with self.assertRaises(RuntimeError):
+            self.locator.find(self.image, timeout=100, max_attempts=3, interval=1)
+        self.assertEqual(len(self.screenshots), 3)
+        self.assertEqual(self.now, 2)
+
+    def test_find_timeout(self) -> None:
+        self.screen.paste((255, 255, 255), (0, 0, 64, 48))
+        with self.assertRaises(RuntimeError):
+            self.locator.find(self.image, timeout=2.5, max_attempts=100, interval=1)
+        self.assertEqual(len(self.screenshots), 3)
+        self.assertLessEqual(self.now, 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+import main
+from google_sheets import client, emulator, rate_limiter
+
+
+class TeamTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sheets = emulator.SheetsEmulator(seed=0)
+        client.set_service_factory(lambda: self.sheets)
+        rate_limiter.set_quotas(1_000_000, 1_000_000)
+        team_ids = self.sheets.add_game(main.Game.SPREADSHEET_ID, 1, num_power_ups=5)
+        self.game = main.Game(team_ids)
+        self.sheet = self.sheets.get_spreadsheet(team_ids[0]).get_sheet_by_title('Game')
+
+    def tearDown(self) -> None:
+        client.set_service_factory(None)
+        rate_limiter.set_quotas(rate_limiter.READ_QUOTA_PER_MINUTE, rate_limiter.WRITE_QUOTA_PER_MINUTE)
+
+    def count_curses(self) -> int:
+        return sum(1 for row in range(1, self.sheet.row_count()) if self.sheet.get_value(row, 4))
+
+    def test_completed_power_up_gives_curse(self) -> None:
+        self.sheet.set_value(1, 0, 'TRUE')
+        self.game.process()
+        self.assertEqual(self.count_curses(), 1)
+
+        # Nothing changed, so nothing is read or written
+        self.sheets.reset_stats()
+        self.game.process()
+        self.assertEqual(self.count_curses(), 1)
+        self.assertNotIn('spreadsheets.batchUpdate', self.sheets.calls)
+
+    def test_untick_and_tick_gives_curse(self) -> None:
+        self.sheet.set_value(1, 0, 'TRUE')
+        self.game.process()
+
+        # The number of ticked boxes stays the same, but another power-up was completed
+        self.sheet.set_value(1, 0, 'FALSE')
+        self.sheet.set_value(2, 0, 'TRUE')
+        self.game.process()
+        self.assertEqual(self.count_curses(), 2)
+
+        # Ticking it again doesn't complete it again
+        self.sheet.set_value(1, 0, 'TRUE')
+        self.game.process()
+        self.assertEqual(self.count_curses(), 2)
+
+    def test_failed_write_is_tried_again(self) -> None:
+        team = self.game.teams[0]
+        with mock.patch.object(client, 'backoff_delay', return_value=0):
+            self.sheets.quotas['write'] = 0
+            self.sheet.set_value(1, 0, 'TRUE')
+            self.game.process()
+        self.assertEqual(self.count_curses(), 0)
+        # Nothing that wasn't written may end up in a snapshot
+        self.assertIsNone(team.get_state()['written_columns'])
+        self.assertEqual(team.completed_power_ups, 0)
+
+        self.sheets.quotas['write'] = None
+        self.game.process()
+        self.assertEqual(self.count_curses(), 1)
+        self.assertIsNotNone(team.get_state()['written_columns'])
+
+
+if __name__ == '__main__':
+    unittest.main()